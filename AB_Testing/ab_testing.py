@@ -60,6 +60,14 @@ sample10 = np.random.choice(a=population, size=100)
 # at a different observation point, we can make a stronger inference when we select
 # more than one sample and take the average of them.
 
+# The same experiment at scale: 1e6 samples of size 100 in vectorized blocks, with independent seeded streams.
+
+from measurement_problems.ab.simulation import simulate_sampling_distribution
+
+sample_means = simulate_sampling_distribution(population, n=100, n_samples=1_000_000, reducer="mean", seed=10)
+sample_means.mean()
+sample_means.std()  # ~ population.std() / sqrt(100)
+
 ############################
 # Descriptive Statistics
 ############################
@@ -329,6 +337,18 @@ test_stat, pvalue = mannwhitneyu(df[(df["Progress"] > 75)]["Rating"],
 
 print('Test Stat = %.4f, p-value = %.4f' % (test_stat, pvalue))
 
+# Bootstrap güven aralığı ve permütasyon p-value (ortalamalar farkı için):
+
+from measurement_problems.ab.resampling import bootstrap_mean_diff, permutation_test_mean_diff
+
+bootstrap = bootstrap_mean_diff(df[(df["Progress"] > 75)]["Rating"],
+                                df[(df["Progress"] < 25)]["Rating"], n_resamples=10_000, seed=115)
+print('Diff = %.4f, CI = (%.4f, %.4f)' % (bootstrap["statistic"], bootstrap["ci_low"], bootstrap["ci_high"]))
+
+permutation = permutation_test_mean_diff(df[(df["Progress"] > 75)]["Rating"],
+                                         df[(df["Progress"] < 25)]["Rating"], n_resamples=10_000, seed=115)
+print('Diff = %.4f, p-value = %.4f' % (permutation["statistic"], permutation["pvalue"]))
+
 
 ######################################################
 # AB Testing (İki Örneklem Oran Testi)
@@ -373,6 +393,17 @@ test_stat, pvalue = proportions_ztest(count=[female_succ_count, male_succ_count]
                                             df.loc[df["sex"] == "male", "survived"].shape[0]])
 print('Test Stat = %.4f, p-value = %.4f' % (test_stat, pvalue))
 
+# Aynı test, sayımlar tek bir groupby ile çıkarılarak ve tüm segmentler için tek bir NumPy geçişiyle:
+
+from measurement_problems.ab.proportions import proportion_counts, segment_proportions_ztest
+
+proportion_counts(df, ["sex"], "survived")
+
+segment_proportions_ztest(df, [], "sex", "survived", variants=("female", "male"))
+
+# Segment bazında (ör. class x embark_town) kadın ve erkeklerin hayatta kalma oranları:
+segment_proportions_ztest(df, ["class", "embark_town"], "sex", "survived", variants=("female", "male"))
+
 
 ######################################################
 # ANOVA (Analysis of Variance)
@@ -440,3 +471,28 @@ from statsmodels.stats.multicomp import MultiComparison
 comparison = MultiComparison(df['total_bill'], df['day'])
 tukey = comparison.tukeyhsd(0.05)
 print(tukey.summary())
+
+
+######################################################
+# Batched AB Testing for Many Experiments
+######################################################
+
+# The steps above (shapiro -> levene -> ttest_ind / mannwhitneyu, or f_oneway / kruskal) are applied automatically
+# to every (experiment, metric) pair of a long-format table.
+# n_jobs > 1 spreads the pairs over a process pool; that needs an if __name__ == "__main__" guard on macOS and Windows.
+
+from measurement_problems.ab.runner import run_experiments
+
+df = sns.load_dataset("tips")
+long_df = df.melt(id_vars=["smoker"], value_vars=["total_bill", "tip"], var_name="metric", value_name="value")
+long_df["experiment"] = "smoker"
+
+run_experiments(long_df, variant_col="smoker", n_jobs=1)
+
+# Aynı karşılaştırma, özet tablo yerine dizi tabanlı bir DataFrame olarak:
+
+from measurement_problems.ab.posthoc import pairwise_comparisons
+
+pairwise_comparisons(df['total_bill'], df['day'], method="tukey", alpha=0.05)
+
+pairwise_comparisons(df['total_bill'], df['day'], method="holm", alpha=0.05)
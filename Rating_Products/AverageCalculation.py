@@ -17,6 +17,9 @@ import pandas as pd
 import math
 import scipy.stats as st
 from sklearn.preprocessing import MinMaxScaler
+from measurement_problems.course_rating import CourseRatingAccumulator, TimeDecayedRatings, \
+    grouped_course_weighted_rating, time_decayed_average
+from measurement_problems.trends import RatingTrendMonitor
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
@@ -144,10 +147,10 @@ df.loc[(df['days'] > 180), 'Rating'].mean() * 22 / 100
 # region Time Based Weighted Average Function
 
 def time_based_weighted_average(dataframe, w1=28, w2=26, w3=24, w4=22):
-    return dataframe.loc[df['days'] <= 30, 'Rating'].mean() * w1 / 100 + \
-           dataframe.loc[(df['days'] > 30) & (df['days'] <= 90), 'Rating'].mean() * w2 / 100 + \
-           dataframe.loc[(df['days'] > 90) & (df['days'] <= 180), 'Rating'].mean() * w3 / 100 + \
-           dataframe.loc[(df['days'] > 180), 'Rating'].mean() * w4 / 100
+    return dataframe.loc[dataframe['days'] <= 30, 'Rating'].mean() * w1 / 100 + \
+           dataframe.loc[(dataframe['days'] > 30) & (dataframe['days'] <= 90), 'Rating'].mean() * w2 / 100 + \
+           dataframe.loc[(dataframe['days'] > 90) & (dataframe['days'] <= 180), 'Rating'].mean() * w3 / 100 + \
+           dataframe.loc[(dataframe['days'] > 180), 'Rating'].mean() * w4 / 100
 
 
 time_based_weighted_average(df)
@@ -169,8 +172,8 @@ time_based_weighted_average(df, 30, 26, 22, 22)
 df.groupby('Progress').agg({'Rating': 'mean'})
 
 df.loc[df['Progress'] <= 10, 'Rating'].mean() * 22 / 100 + \
-df.loc[(df['Progress'] > 10) & (df['days'] <= 45), 'Rating'].mean() * 24 / 100 + \
-df.loc[(df['Progress'] > 40) & (df['days'] <= 75), 'Rating'].mean() * 26 / 100 + \
+df.loc[(df['Progress'] > 10) & (df['Progress'] <= 45), 'Rating'].mean() * 24 / 100 + \
+df.loc[(df['Progress'] > 45) & (df['Progress'] <= 75), 'Rating'].mean() * 26 / 100 + \
 df.loc[(df['Progress'] > 75), 'Rating'].mean() * 28 / 100
 
 # endregion
@@ -178,10 +181,10 @@ df.loc[(df['Progress'] > 75), 'Rating'].mean() * 28 / 100
 # region User-Based Weighted Average Function
 
 def user_based_weighted_average(dataframe, w1=22, w2=24, w3=26, w4=28):
-    return dataframe.loc[df['Progress'] <= 10, 'Rating'].mean() * w1 / 100 + \
-           dataframe.loc[(df['Progress'] > 10) & (df['days'] <= 45), 'Rating'].mean() * w2 / 100 + \
-           dataframe.loc[(df['Progress'] > 40) & (df['days'] <= 75), 'Rating'].mean() * w3 / 100 + \
-           dataframe.loc[(df['Progress'] > 75), 'Rating'].mean() * w4 / 100
+    return dataframe.loc[dataframe['Progress'] <= 10, 'Rating'].mean() * w1 / 100 + \
+           dataframe.loc[(dataframe['Progress'] > 10) & (dataframe['Progress'] <= 45), 'Rating'].mean() * w2 / 100 + \
+           dataframe.loc[(dataframe['Progress'] > 45) & (dataframe['Progress'] <= 75), 'Rating'].mean() * w3 / 100 + \
+           dataframe.loc[(dataframe['Progress'] > 75), 'Rating'].mean() * w4 / 100
 
 
 user_based_weighted_average(df, 20, 24, 26, 30)
@@ -211,3 +214,100 @@ course_weighted_rating(df)
 course_weighted_rating(df, time_w=40, user_w=60)
 
 # endregion
+
+####################
+# Streaming Course Weighted Rating
+####################
+
+# region Streaming Course Weighted Rating
+
+"""
+course_weighted_rating rescans the whole frame for every bucket on every call.
+When new reviews keep arriving, CourseRatingAccumulator keeps running sums and counts per bucket instead.
+As the current date advances, reviews are moved to older time buckets lazily.
+"""
+
+accumulator = CourseRatingAccumulator.from_dataframe(df, current_date=current_date)
+accumulator.course_weighted_rating()
+
+accumulator.add_review(rating=5.0, timestamp='2021-02-09 12:00:00', progress=80.0)
+accumulator.course_weighted_rating()
+
+accumulator.advance_to('2021-03-10')
+accumulator.course_weighted_rating(time_w=40, user_w=60)
+
+# endregion
+
+####################
+# Multi-Course Weighted Rating
+####################
+
+# region Multi-Course Weighted Rating
+
+"""
+The functions above score a single course per DataFrame.
+With one long reviews table for many courses, grouped_course_weighted_rating assigns the buckets once
+and returns one weighted rating per course from a single groupby aggregation.
+This dataset only has one course, so we split it into two pseudo courses for the example.
+"""
+
+df['course_id'] = df.index % 2
+
+grouped_course_weighted_rating(df, 'course_id')
+
+course_weighted_rating(df[df['course_id'] == 0])
+
+# endregion
+
+####################
+# Time-Decayed Rating
+####################
+
+# region Time-Decayed Rating
+
+"""
+The time buckets use hard edges: a review counts with weight 28 at day 30 and with weight 26 at day 31.
+With exponential decay, a review's weight halves every half_life days, so the score moves smoothly as reviews age.
+TimeDecayedRatings keeps only a decayed sum and a decayed weight per course and updates them in O(1) per review;
+advancing the date is O(1) as well, the course states are rescaled when they are read.
+"""
+
+time_decayed_average(df, half_life=30, current_date=current_date)
+
+time_decayed_average(df, half_life=90, current_date=current_date)
+
+decayed = TimeDecayedRatings.from_dataframe(df, 'course_id', half_life=30, current_date=current_date,
+                                            prior_mean=df['Rating'].mean(), prior_weight=20)
+decayed.ratings()
+
+decayed.add_review(0, rating=1.0, timestamp='2021-02-09 12:00:00')
+decayed.rating(0)
+
+# Without new reviews, the effective number of reviews decays and the courses move towards prior_mean.
+decayed.advance_to('2021-06-01')
+decayed.effective_count(0)
+decayed.ratings()
+
+# endregion
+
+####################
+# Rolling 30-Day Trend Monitor
+####################
+
+# region Rolling 30-Day Trend Monitor
+
+"""
+df.loc[df['days'] <= 30, 'Rating'].mean() tells us the recent satisfaction of one course, once.
+RatingTrendMonitor keeps daily rating buckets of the last 60 days per course, so the rolling 30-day mean
+and its change against the 30 days before are updated incrementally as reviews arrive.
+A course whose rolling mean drops significantly raises an alert; poll only returns the courses whose alert changed.
+"""
+
+monitor = RatingTrendMonitor(window_days=30, min_count=20, min_delta=0.2, z_threshold=3.0)
+monitor.add_reviews(df['course_id'], df['Rating'], df['Timestamp'])
+
+monitor.rolling_mean()
+monitor.trends()
+monitor.poll()
+
+# endregion
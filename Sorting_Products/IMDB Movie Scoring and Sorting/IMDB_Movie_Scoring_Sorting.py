@@ -5,9 +5,8 @@
 # region import & read
 
 import pandas as pd
-import math
-import scipy.stats as st
 from sklearn.preprocessing import MinMaxScaler
+from measurement_problems.bar import bayesian_average_rating, bayesian_average_rating_matrix
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.expand_frame_repr', False)
@@ -153,20 +152,7 @@ df.sort_values("weighted_rating", ascending=False).head(10)
 # 292                                         Pulp Fiction
 
 
-def bayesian_average_rating(n, confidence=0.95):
-    if sum(n) == 0:
-        return 0
-    K = len(n)
-    z = st.norm.ppf(1 - (1 - confidence) / 2)
-    N = sum(n)
-    first_part = 0.0
-    second_part = 0.0
-    for k, n_k in enumerate(n):
-        first_part += (k + 1) * (n[k] + 1) / (N + K)
-        second_part += (k + 1) * (k + 1) * (n[k] + 1) / (N + K)
-    score = first_part - z * math.sqrt((second_part - first_part * first_part) / (N + K + 1))
-    return score
-
+# bayesian_average_rating comes from the shared BAR engine (measurement_problems.bar).
 
 bayesian_average_rating([34733, 4355, 4704, 6561, 13515, 26183, 87368, 273082, 600260, 1295351])
 
@@ -176,8 +162,9 @@ df = pd.read_csv("datasets/imdb_ratings.csv")
 df = df.iloc[0:, 1:]
 
 
-df["bar_score"] = df.apply(lambda x: bayesian_average_rating(x[["one", "two", "three", "four", "five",
-                                                                "six", "seven", "eight", "nine", "ten"]]), axis=1)
+STAR_COLUMNS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+df["bar_score"] = bayesian_average_rating_matrix(df[STAR_COLUMNS])
 df.sort_values("bar_score", ascending=False).head(20)
 
 
@@ -5,9 +5,10 @@
 # region import & read
 
 import pandas as pd
-import math
-import scipy.stats as st
 from sklearn.preprocessing import MinMaxScaler
+from measurement_problems.bar import bayesian_average_rating_matrix
+from measurement_problems.ranking import HYBRID_SORTING_SCORE, RankingPipeline, column
+from measurement_problems.search_index import CourseSearchIndex
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
@@ -115,27 +116,15 @@ df[df["course_name"].str.contains("Veri Bilimi")].sort_values("weighted_sorting_
 # This calculation can also be used as the final average rating of a product as it gives the average value associated with the rating.
 # It can also be considered as a score because it shows the existing rates lower than they are.
 
-def bayesian_average_rating(n, confidence=0.95):  # n denotes star values and observation frequencies.
-    if sum(n) == 0:
-        return 0
-    K = len(n)
-    z = st.norm.ppf(1 - (1 - confidence) / 2)  # confidence allows you to get the value of the z table value to be calculated.
-    N = sum(n)
-    first_part = 0.0
-    second_part = 0.0
-    for k, n_k in enumerate(n):
-        first_part += (k + 1) * (n[k] + 1) / (N + K)
-        second_part += (k + 1) * (k + 1) * (n[k] + 1) / (N + K)
-    score = first_part - z * math.sqrt((second_part - first_part * first_part) / (N + K + 1))
-    return score
+# Here the score is computed with bayesian_average_rating_matrix of the shared BAR engine (measurement_problems.bar).
+# It takes an (N x K) matrix of star counts, ordered from 1 star to K stars,
+# and scores every product in a single vectorized pass.
+
+STAR_COLUMNS = ["1_point", "2_point", "3_point", "4_point", "5_point"]
 
 df.head()
 
-df["bar_score"] = df.apply(lambda x: bayesian_average_rating(x[["1_point",
-                                                                "2_point",
-                                                                "3_point",
-                                                                "4_point",
-                                                                "5_point"]]), axis=1)
+df["bar_score"] = bayesian_average_rating_matrix(df[STAR_COLUMNS])
 
 df.sort_values("weighted_sorting_score", ascending=False).head(20)
 df.sort_values("bar_score", ascending=False).head(20)
@@ -175,11 +164,7 @@ df[df["course_name"].index.isin([5, 1])].sort_values("bar_score", ascending=Fals
 # region hybrid_sorting_score Function : Hybrid Sorting: BAR Score + Other Factors
 
 def hybrid_sorting_score(dataframe, bar_w=60, wss_w=40):
-    bar_score = dataframe.apply(lambda x: bayesian_average_rating(x[["1_point",
-                                                                     "2_point",
-                                                                     "3_point",
-                                                                     "4_point",
-                                                                     "5_point"]]), axis=1)
+    bar_score = bayesian_average_rating_matrix(dataframe[STAR_COLUMNS])
     wss_score = weighted_sorting_score(dataframe)
 
     return bar_score*bar_w/100 + wss_score*wss_w/100
@@ -191,4 +176,46 @@ df.sort_values("hybrid_sorting_score", ascending=False).head(20)
 
 df[df["course_name"].str.contains("Veri Bilimi")].sort_values("hybrid_sorting_score", ascending=False).head(20)
 
-# endregion
\ No newline at end of file
+# endregion
+
+####################
+# Declarative Ranking Pipeline
+####################
+
+# region RankingPipeline
+
+# The same blend, declared as (scorer, weight, normalization) stages instead of w/100 arithmetic.
+# The *_scaled columns do not have to exist: min-max scaling is a stage of the pipeline,
+# and the whole blend is computed in one columnar pass without adding columns to df.
+
+HYBRID_SORTING_SCORE.score(df)  # Same values as df["hybrid_sorting_score"].
+
+HYBRID_SORTING_SCORE.rank(df, k=20, where=lambda x: x["course_name"].str.contains("Veri Bilimi"))
+
+# Other blends are declared the same way, e.g. BAR with a stronger weight on purchases:
+RankingPipeline([("bar", 50),
+                 (column("purchase_count"), 30, "minmax"),
+                 (column("commment_count"), 20, "minmax")]).rank(df, k=20)
+
+# endregion
+
+####################
+# Filtered Ranking with an Inverted Index
+####################
+
+# region CourseSearchIndex
+
+# str.contains scans every course name on each query and then the whole subset is sorted.
+# CourseSearchIndex keeps posting lists ordered by hybrid_sorting_score,
+# so a filtered top-K query only reads the head of a posting list.
+
+index = CourseSearchIndex.from_dataframe(df, score_col="hybrid_sorting_score")
+
+df.loc[index.contains("Veri Bilimi", k=20)]  # Same rows as the str.contains query above.
+
+df.loc[index.search("veri bilimi okulu", k=20)]  # Whole words, case-insensitive, course or instructor name.
+
+# When a product's counts change, only its own postings are moved.
+index.update_score(5, 4.9)
+
+# endregion
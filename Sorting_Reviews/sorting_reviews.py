@@ -3,8 +3,7 @@
 ############################################
 
 import pandas as pd
-import math
-import scipy.stats as st
+from measurement_problems import wilson_lower_bound, wilson_lower_bound_batch
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.expand_frame_repr', False)
@@ -56,38 +55,7 @@ score_average_rating(100, 1)
 
 
 
-def wilson_lower_bound(up, down, confidence=0.95):
-    """
-
-    Wilson Lower Bound Score calculation
-
-    - The lower limit of the confidence interval to be calculated for the Bernoulli parameter p is accepted as the WLB score.
-    - The calculated score is used for product ranking.
-    - Note:
-    If the scores are between 1-5, 1-3 are marked as negative, 4-5 as positive and can be made to conform to Bernoulli.
-    This causes some problems. For this reason, it is necessary to make a bayesian average rating.
-
-    Parameters
-    ----------
-    up: int
-        up count
-    down: int
-        down count
-    confidence: float
-        confidence
-
-    Returns
-    -------
-    wilson score: float
-
-    """
-    n = up + down
-    if n == 0:
-        return 0
-    z = st.norm.ppf(1 - (1 - confidence) / 2)
-    phat = 1.0 * up / n
-    return (phat + z * z / (2 * n) - z * math.sqrt((phat * (1 - phat) + z * z / (4 * n)) / n)) / (1 + z * z / n)
-
+# wilson_lower_bound and wilson_lower_bound_batch come from the library (measurement_problems.reviews).
 
 wilson_lower_bound(600, 400)
 wilson_lower_bound(5500, 4500)
@@ -118,16 +86,8 @@ comments["score_pos_neg_diff"] = comments.apply(lambda x: score_up_down_diff(x["
 comments["score_average_rating"] = comments.apply(lambda x: score_average_rating(x["up"], x["down"]), axis=1)
 
 # wilson_lower_bound
-comments["wilson_lower_bound"] = comments.apply(lambda x: wilson_lower_bound(x["up"], x["down"]), axis=1)
+comments["wilson_lower_bound"] = wilson_lower_bound_batch(comments["up"], comments["down"])
 
 
 
 comments.sort_values("wilson_lower_bound", ascending=False)
-
-
-
-
-
-
-
-
@@ -0,0 +1,29 @@
+###################################################
+# Benchmark: Bayesian Average Rating engine
+###################################################
+
+# Compares the per-row df.apply path against the vectorized (N x K) engine
+# on a synthetic catalog with the 10-column IMDB star layout.
+# Run from the repository root: python -m benchmarks.bench_bar
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.bar import bayesian_average_rating, bayesian_average_rating_matrix
+
+STAR_COLUMNS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+rng = np.random.default_rng(42)
+catalog = pd.DataFrame(rng.integers(0, 5000, size=(2_000_000, 10), dtype=np.uint32), columns=STAR_COLUMNS)
+
+# The apply path is only timed on a slice and extrapolated; it takes minutes on the full catalog.
+sample = catalog.head(20_000)
+apply_time = timeit.timeit(lambda: sample.apply(lambda x: bayesian_average_rating(x[STAR_COLUMNS]), axis=1),
+                           number=1) * len(catalog) / len(sample)
+matrix_time = timeit.timeit(lambda: bayesian_average_rating_matrix(catalog[STAR_COLUMNS]), number=3) / 3
+
+print('rows: %d' % len(catalog))
+print('apply (extrapolated): %.2f s, matrix: %.4f s, speedup: %.0fx' % (apply_time, matrix_time,
+                                                                       apply_time / matrix_time))
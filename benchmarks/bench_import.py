@@ -0,0 +1,62 @@
+###################################################
+# Benchmark: library import time
+###################################################
+
+# Times cold imports of the scoring library in fresh interpreters, next to the heavy dependencies
+# it now loads lazily, and checks which of them every entry point actually pulls in.
+# Run from the repository root: python -m benchmarks.bench_import
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPEATS = 7
+HEAVY_MODULES = ["pandas", "scipy", "sklearn", "statsmodels"]
+
+STATEMENTS = {
+    "numpy (baseline)": "import numpy",
+    "import measurement_problems": "import measurement_problems",
+    "wilson_lower_bound": "from measurement_problems import wilson_lower_bound",
+    "wilson_lower_bound + call": "from measurement_problems import wilson_lower_bound; wilson_lower_bound(600, 400)",
+    "bayesian_average_rating": "from measurement_problems import bayesian_average_rating",
+    "weighted_rating": "from measurement_problems import weighted_rating",
+    "hybrid_sorting_score": "from measurement_problems import hybrid_sorting_score",
+    "course_weighted_rating": "from measurement_problems import course_weighted_rating",
+    "run_experiments": "from measurement_problems import run_experiments",
+    "run_experiments + scipy": "from measurement_problems import run_experiments; import scipy.stats",
+    "scipy.stats": "import scipy.stats",
+    "pandas": "import pandas",
+    "sklearn.preprocessing": "import sklearn.preprocessing",
+    "statsmodels.stats.api": "import statsmodels.stats.api",
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_import(statement):
+    # A new interpreter per run, so nothing is already in sys.modules.
+    process = subprocess.run([sys.executable, "-c", PROBE, statement], cwd=ROOT, capture_output=True, text=True)
+    if process.returncode != 0:
+        return None
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+print('%-30s %10s   %s' % ('statement', 'median ms', 'heavy modules loaded'))
+for label, statement in STATEMENTS.items():
+    runs = [cold_import(statement) for _ in range(REPEATS)]
+    if any(run is None for run in runs):
+        print('%-30s %10s' % (label, 'n/a'))
+        continue
+    median_ms = statistics.median(run["seconds"] for run in runs) * 1000
+    print('%-30s %10.1f   %s' % (label, median_ms, ', '.join(runs[0]["loaded"]) or '-'))
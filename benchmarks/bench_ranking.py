@@ -0,0 +1,53 @@
+###################################################
+# Benchmark: declarative ranking pipelines
+###################################################
+
+# For every ranking blend, compares the hand-written path (score columns added to the frame one by one
+# and blended with w / 100 arithmetic) with the compiled RankingPipeline, and checks that both agree.
+# Run from the repository root: python -m benchmarks.bench_ranking
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.imdb import add_movie_scores
+from measurement_problems.ranking import HYBRID_SORTING_SCORE, MOVIE_SCORE, REVIEW_SCORE
+from measurement_problems.reviews import wilson_lower_bound_batch
+from measurement_problems.sorting import PRODUCT_STAR_COLUMNS, add_product_scores
+
+rng = np.random.default_rng(42)
+n = 1_000_000
+
+catalog = pd.DataFrame(rng.integers(0, 5000, size=(n, 5)), columns=PRODUCT_STAR_COLUMNS)
+catalog["purchase_count"] = rng.integers(0, 50_000, n)
+catalog["commment_count"] = rng.integers(0, 5_000, n)
+catalog["rating"] = rng.uniform(1, 5, n).round(1)
+
+reviews = pd.DataFrame({"up": rng.integers(0, 500, n), "down": rng.integers(0, 100, n)})
+
+movies = pd.DataFrame({"vote_average": rng.uniform(1, 10, n).round(1), "vote_count": rng.integers(0, 20_000, n)})
+
+
+def wilson_by_hand(frame):
+    frame = frame.copy()
+    frame["wilson_lower_bound"] = wilson_lower_bound_batch(frame["up"], frame["down"])
+    return frame["wilson_lower_bound"]
+
+
+blends = {
+    "catalog (BAR 60 + WSS 40)": (lambda: add_product_scores(catalog.copy())["hybrid_sorting_score"],
+                                  lambda: HYBRID_SORTING_SCORE.score(catalog)),
+    "reviews (WLB)": (lambda: wilson_by_hand(reviews),
+                      lambda: REVIEW_SCORE.score(reviews)),
+    "movies (IMDB WR)": (lambda: add_movie_scores(movies.copy())["weighted_rating"],
+                         lambda: MOVIE_SCORE.score(movies)),
+}
+
+print('rows: %d' % n)
+for name, (by_hand, pipeline) in blends.items():
+    error = np.abs(by_hand().to_numpy() - pipeline()).max()
+    hand_time = timeit.timeit(by_hand, number=3) / 3
+    pipeline_time = timeit.timeit(pipeline, number=3) / 3
+    print('%-26s by hand: %.4f s, pipeline: %.4f s, speedup: %.1fx, max abs diff: %.1e' % (
+        name, hand_time, pipeline_time, hand_time / pipeline_time, error))
@@ -0,0 +1,67 @@
+###################################################
+# Benchmark: micro-batching scoring service
+###################################################
+
+# Starts the scoring service on localhost and drives it with concurrent keep-alive clients
+# sending one-item requests of every kind, with and without micro-batching.
+# Client-side p50/p99 latency and throughput are reported next to the server-side batch statistics.
+# Run from the repository root: python -m benchmarks.bench_service
+
+import asyncio
+import time
+
+import numpy as np
+
+from measurement_problems.service import ScoringClient, ScoringService
+
+CLIENTS = 64
+DURATION = 5.0
+
+CONFIGS = {
+    "unbatched (batch 1)": dict(max_batch_size=1, max_delay=0.0),
+    "batch 64, 1 ms": dict(max_batch_size=64, max_delay=0.001),
+    "batch 512, 2 ms": dict(max_batch_size=512, max_delay=0.002),
+}
+
+
+def random_item(rng, kind):
+    if kind == "reviews":
+        return {"up": int(rng.integers(0, 500)), "down": int(rng.integers(0, 100))}
+    if kind == "products":
+        return {"stars": rng.integers(0, 1000, 5).tolist()}
+    return {"vote_average": round(float(rng.uniform(1, 10)), 1), "vote_count": int(rng.integers(0, 20_000))}
+
+
+async def client_loop(port, seed, deadline, latencies):
+    rng = np.random.default_rng(seed)
+    kinds = ("reviews", "products", "movies")
+    client = ScoringClient(port=port)
+    try:
+        while time.perf_counter() < deadline:
+            kind = kinds[rng.integers(0, 3)]
+            start = time.perf_counter()
+            await client.score(kind, [random_item(rng, kind)])
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+
+
+async def run(config):
+    service = await ScoringService(movie_C=5.6, **config).start(port=0)
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + DURATION
+    await asyncio.gather(*(client_loop(service.port, seed, deadline, latencies) for seed in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    stats = service.stats.snapshot()
+    await service.close()
+
+    p50, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 99])
+    return len(latencies) / elapsed, p50, p99, stats
+
+
+print('%d concurrent clients, %.0f s per configuration, one item per request' % (CLIENTS, DURATION))
+for name, config in CONFIGS.items():
+    throughput, p50, p99, stats = asyncio.run(run(config))
+    print('%-20s %7.0f req/s   p50 %6.2f ms   p99 %6.2f ms   server p50 %6.2f ms   mean batch %5.1f' % (
+        name, throughput, p50, p99, stats["p50_ms"], stats["mean_batch_size"]))
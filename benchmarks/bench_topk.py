@@ -0,0 +1,35 @@
+###################################################
+# Benchmark: top-K with partial selection vs sort_values().head()
+###################################################
+
+# Run from the repository root: python -m benchmarks.bench_topk
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.topk import top_k, top_k_per_group
+
+rng = np.random.default_rng(42)
+n = 2_000_000
+catalog = pd.DataFrame({"category": pd.Categorical(rng.integers(0, 200, n)),
+                        "veri_bilimi": rng.random(n) < 0.1,
+                        "hybrid_sorting_score": rng.random(n) * 5})
+
+cases = {
+    "top 20": (lambda: catalog.sort_values("hybrid_sorting_score", ascending=False).head(20),
+               lambda: top_k(catalog, "hybrid_sorting_score", 20)),
+    "filtered top 20": (lambda: catalog[catalog["veri_bilimi"]].sort_values("hybrid_sorting_score",
+                                                                             ascending=False).head(20),
+                        lambda: top_k(catalog, "hybrid_sorting_score", 20, where=catalog["veri_bilimi"])),
+    "top 20 per category": (lambda: catalog.sort_values("hybrid_sorting_score", ascending=False)
+                                           .groupby("category", observed=True).head(20),
+                            lambda: top_k_per_group(catalog, "hybrid_sorting_score", "category", 20)),
+}
+
+for name, (sort_head, partial) in cases.items():
+    sort_time = timeit.timeit(sort_head, number=3) / 3
+    partial_time = timeit.timeit(partial, number=3) / 3
+    print('%-20s sort_values().head(): %.4f s, top_k: %.4f s, speedup: %.1fx' % (name, sort_time, partial_time,
+                                                                                 sort_time / partial_time))
@@ -0,0 +1,65 @@
+###################################################
+# Benchmark: sliding-window rating trend monitor
+###################################################
+
+# 50k courses with 60 days of reviews, refreshed once per simulated day with that day's reviews.
+# Compares the incremental monitor (add_reviews + poll) with recomputing the 30-day and previous 30-day
+# means per course from the review history with pandas on every refresh.
+# Run from the repository root: python -m benchmarks.bench_trends
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.trends import RatingTrendMonitor
+
+rng = np.random.default_rng(42)
+N_COURSES = 50_000
+REVIEWS_PER_DAY = 50_000
+HISTORY_DAYS = 60
+REFRESH_DAYS = 10
+START = pd.Timestamp("2021-01-01")
+
+
+def reviews_of_day(day):
+    seconds = rng.integers(0, 86_400, REVIEWS_PER_DAY)
+    return pd.DataFrame({"course_id": rng.integers(0, N_COURSES, REVIEWS_PER_DAY),
+                         "Rating": rng.integers(1, 6, REVIEWS_PER_DAY).astype(np.float64),
+                         "Timestamp": START + pd.to_timedelta(day * 86_400 + seconds, unit="s")})
+
+
+def pandas_refresh(history, current_date):
+    days = (current_date - history["Timestamp"]).dt.days
+    current = history[(days >= 0) & (days < 30)].groupby("course_id")["Rating"].agg(["mean", "count"])
+    baseline = history[(days >= 30) & (days < 60)].groupby("course_id")["Rating"].agg(["mean", "count"])
+    return current["mean"] - baseline["mean"]
+
+
+history = pd.concat([reviews_of_day(day) for day in range(HISTORY_DAYS)], ignore_index=True)
+
+start = time.perf_counter()
+monitor = RatingTrendMonitor(min_count=20)
+monitor.add_reviews(history["course_id"].to_numpy(), history["Rating"].to_numpy(), history["Timestamp"])
+monitor.poll()
+print('warm up: %d reviews of %d courses in %.2f s, state: %.1f MB' % (len(history), len(monitor),
+                                                                       time.perf_counter() - start,
+                                                                       monitor.nbytes / 2 ** 20))
+
+monitor_times, pandas_times = [], []
+for day in range(HISTORY_DAYS, HISTORY_DAYS + REFRESH_DAYS):
+    new_reviews = reviews_of_day(day)
+    history = pd.concat([history, new_reviews], ignore_index=True)
+
+    start = time.perf_counter()
+    monitor.add_reviews(new_reviews["course_id"].to_numpy(), new_reviews["Rating"].to_numpy(),
+                        new_reviews["Timestamp"])
+    monitor.poll()
+    monitor_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pandas_refresh(history, monitor.current_date)
+    pandas_times.append(time.perf_counter() - start)
+
+print('daily refresh of %d reviews: monitor %.3f s, pandas recompute %.3f s (median of %d days)' % (
+    REVIEWS_PER_DAY, np.median(monitor_times), np.median(pandas_times), REFRESH_DAYS))
@@ -0,0 +1,25 @@
+###################################################
+# Benchmark: Wilson Lower Bound, apply vs batch
+###################################################
+
+# The row-by-row apply path makes one Python call and one tiny array computation per review.
+# The batch path scores all pairs in one vectorized pass.
+# Run from the repository root: python -m benchmarks.bench_wilson
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.reviews import wilson_lower_bound, wilson_lower_bound_batch
+
+rng = np.random.default_rng(42)
+bench = pd.DataFrame({"up": rng.integers(0, 500, 20_000),
+                      "down": rng.integers(0, 100, 20_000)})
+
+apply_time = timeit.timeit(lambda: bench.apply(lambda x: wilson_lower_bound(x["up"], x["down"]), axis=1),
+                           number=1)
+batch_time = timeit.timeit(lambda: wilson_lower_bound_batch(bench["up"], bench["down"]), number=10) / 10
+
+print('rows: %d' % len(bench))
+print('apply: %.4f s, batch: %.4f s, speedup: %.0fx' % (apply_time, batch_time, apply_time / batch_time))
@@ -0,0 +1,65 @@
+"""
+Reusable scoring engines shared by the Measurement Problems scripts.
+
+- Importing the package does no I/O and loads none of pandas, scipy, sklearn or statsmodels.
+- The public functions below are resolved on first attribute access, so
+  `from measurement_problems import wilson_lower_bound` only imports numpy and measurement_problems.reviews.
+- scipy is imported inside the functions that need a distribution, on their first call.
+"""
+
+import importlib
+
+_EXPORTS = {
+    # Sorting reviews
+    "score_up_down_diff": "measurement_problems.reviews",
+    "score_average_rating": "measurement_problems.reviews",
+    "wilson_lower_bound": "measurement_problems.reviews",
+    "wilson_lower_bound_batch": "measurement_problems.reviews",
+    # Rating and sorting products
+    "bayesian_average_rating": "measurement_problems.bar",
+    "bayesian_average_rating_matrix": "measurement_problems.bar",
+    "weighted_sorting_score": "measurement_problems.sorting",
+    "hybrid_sorting_score": "measurement_problems.sorting",
+    "add_product_scores": "measurement_problems.sorting",
+    "weighted_rating": "measurement_problems.imdb",
+    "add_movie_scores": "measurement_problems.imdb",
+    "min_max_scale": "measurement_problems.scaling",
+    "time_based_weighted_average": "measurement_problems.course_rating",
+    "user_based_weighted_average": "measurement_problems.course_rating",
+    "course_weighted_rating": "measurement_problems.course_rating",
+    "grouped_course_weighted_rating": "measurement_problems.course_rating",
+    "time_decayed_average": "measurement_problems.course_rating",
+    "TimeDecayedRatings": "measurement_problems.course_rating",
+    "RatingTrendMonitor": "measurement_problems.trends",
+    "top_k": "measurement_problems.topk",
+    "RankingPipeline": "measurement_problems.ranking",
+    "Stage": "measurement_problems.ranking",
+    "column": "measurement_problems.ranking",
+    "ScoringService": "measurement_problems.service",
+    # A/B tests
+    "choose_and_run_test": "measurement_problems.ab.runner",
+    "run_experiments": "measurement_problems.ab.runner",
+    "proportions_ztest_batch": "measurement_problems.ab.proportions",
+    "segment_proportions_ztest": "measurement_problems.ab.proportions",
+    "bootstrap_mean_diff": "measurement_problems.ab.resampling",
+    "permutation_test_mean_diff": "measurement_problems.ab.resampling",
+    "pairwise_comparisons": "measurement_problems.ab.posthoc",
+    "SequentialMeanTest": "measurement_problems.ab.sequential",
+    "SequentialProportionTest": "measurement_problems.ab.sequential",
+    "ttest_sample_size": "measurement_problems.ab.power",
+    "proportions_sample_size": "measurement_problems.ab.power",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
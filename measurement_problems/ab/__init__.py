@@ -0,0 +1,3 @@
+"""
+A/B testing tools built on the workflow of AB_Testing/ab_testing.py.
+"""
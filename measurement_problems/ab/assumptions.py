@@ -0,0 +1,77 @@
+"""
+Memoized normality (shapiro) and variance homogeneity (levene) checks.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def fingerprint(values):
+    """
+    Content fingerprint of a group: a hash of the float64 array buffer plus its length.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    digest = hashlib.blake2b(memoryview(values).cast("B"), digest_size=16).hexdigest()
+    return "%s:%d" % (digest, len(values))
+
+
+class AssumptionCache:
+    """
+
+    LRU cache of shapiro and levene results keyed by the content fingerprint of the groups.
+
+    - Re-running the same checks on unchanged segments only costs hashing the data.
+    - hits and misses counters are exposed, as with functools.lru_cache().cache_info().
+
+    Parameters
+    ----------
+    maxsize: int
+        maximum number of cached results
+
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def _get_or_compute(self, key, compute):
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        self.misses += 1
+        result = compute()
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def shapiro(self, values):
+        """
+        (test_stat, pvalue) of shapiro(values).
+        """
+        from scipy import stats
+
+        key = ("shapiro", fingerprint(values))
+        return self._get_or_compute(key, lambda: tuple(map(float, stats.shapiro(values))))
+
+    def levene(self, *samples, center="median"):
+        """
+        (test_stat, pvalue) of levene(*samples, center=center).
+        """
+        from scipy import stats
+
+        key = ("levene", center) + tuple(fingerprint(sample) for sample in samples)
+        return self._get_or_compute(key, lambda: tuple(map(float, stats.levene(*samples, center=center))))
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._results)}
+
+    def clear(self):
+        self._results.clear()
+        self.hits = self.misses = 0
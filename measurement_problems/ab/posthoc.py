@@ -0,0 +1,147 @@
+"""
+Post-hoc pairwise comparisons (Tukey HSD and p-value corrections) from one grouped pass.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("tukey", "bonferroni", "holm", "fdr_bh")
+
+
+def adjust_pvalues(pvalues, method="holm"):
+    """
+
+    Multiple-comparison correction of p-values, vectorized.
+
+    Parameters
+    ----------
+    pvalues: array-like
+        raw p-values
+    method: str
+        "bonferroni", "holm" (step-down) or "fdr_bh" (Benjamini-Hochberg)
+
+    Returns
+    -------
+    adjusted p-values: np.ndarray, in the input order
+
+    """
+    pvalues = np.asarray(pvalues, dtype=np.float64)
+    m = len(pvalues)
+    if method == "bonferroni":
+        return np.minimum(pvalues * m, 1.0)
+
+    order = np.argsort(pvalues)
+    ranked = pvalues[order]
+    if method == "holm":
+        adjusted = np.minimum(np.maximum.accumulate(ranked * (m - np.arange(m))), 1.0)
+    elif method == "fdr_bh":
+        adjusted = np.minimum(np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1], 1.0)
+    else:
+        raise ValueError("method must be one of 'bonferroni', 'holm', 'fdr_bh', got %r" % method)
+
+    result = np.empty(m)
+    result[order] = adjusted
+    return result
+
+
+def group_stats(values, groups):
+    """
+    Labels, count, mean and M2 of every group, from one factorize and bincount pass over the data.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, labels = pd.factorize(np.asarray(groups), sort=True)
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+
+    n = np.bincount(codes, minlength=len(labels)).astype(np.float64)
+    mean = np.bincount(codes, weights=values, minlength=len(labels)) / n
+    m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=len(labels))
+    return np.asarray(labels), n, mean, m2
+
+
+def pairwise_comparisons(values, groups, method="tukey", alpha=0.05):
+    """
+
+    All pairwise group comparisons, e.g. MultiComparison(df['total_bill'], df['day']).tukeyhsd(0.05).
+
+    - Group statistics are computed once; every pair is then evaluated with array operations.
+    - tukey: Tukey HSD with the pooled within-group variance and studentized range p-values and intervals.
+    - bonferroni, holm, fdr_bh: Welch t-test for every pair, with the chosen p-value correction.
+
+    Parameters
+    ----------
+    values: array-like
+        metric values
+    groups: array-like
+        group label of every value
+    method: str
+        one of METHODS
+    alpha: float
+        family-wise error rate (or false discovery rate for fdr_bh)
+
+    Returns
+    -------
+    comparisons: pd.DataFrame with group1, group2, meandiff, statistic, pvalue, pvalue_adj, lower, upper, reject
+
+    """
+    if method not in METHODS:
+        raise ValueError("method must be one of %s, got %r" % (METHODS, method))
+    from scipy.stats import studentized_range, t as t_dist, ttest_ind_from_stats
+
+    labels, n, mean, m2 = group_stats(values, groups)
+    k = len(labels)
+    i, j = np.triu_indices(k, 1)
+    meandiff = mean[j] - mean[i]
+
+    if method == "tukey":
+        df_within = n.sum() - k
+        mse = m2.sum() / df_within
+        se = np.sqrt(mse / 2 * (1 / n[i] + 1 / n[j]))
+        statistic = np.abs(meandiff) / se
+        pvalue = studentized_range.sf(statistic, k, df_within)
+        pvalue_adj = pvalue
+        margin = studentized_range.ppf(1 - alpha, k, df_within) * se
+    else:
+        std = np.sqrt(m2 / (n - 1))
+        statistic, pvalue = ttest_ind_from_stats(mean[j], std[j], n[j], mean[i], std[i], n[i], equal_var=False)
+        pvalue_adj = adjust_pvalues(pvalue, method)
+
+        var_i, var_j = std[i] ** 2 / n[i], std[j] ** 2 / n[j]
+        df_welch = (var_i + var_j) ** 2 / (var_i ** 2 / (n[i] - 1) + var_j ** 2 / (n[j] - 1))
+        # Bonferroni-adjusted intervals for every method other than Tukey.
+        margin = t_dist.ppf(1 - alpha / (2 * len(i)), df_welch) * np.sqrt(var_i + var_j)
+
+    return pd.DataFrame({"group1": labels[i], "group2": labels[j], "meandiff": meandiff,
+                         "statistic": statistic, "pvalue": pvalue, "pvalue_adj": pvalue_adj,
+                         "lower": meandiff - margin, "upper": meandiff + margin,
+                         "reject": pvalue_adj < alpha})
+
+
+def _metric_task(task):
+    metric, values, groups, method, alpha = task
+    comparisons = pairwise_comparisons(values, groups, method, alpha)
+    comparisons.insert(0, "metric", metric)
+    return comparisons
+
+
+def pairwise_comparisons_by_metric(dataframe, metric_col, group_col, value_col, method="tukey", alpha=0.05,
+                                   n_jobs=1):
+    """
+
+    pairwise_comparisons for every metric of a long-format table, spread over a process pool.
+
+    Returns
+    -------
+    comparisons: pd.DataFrame with a metric column followed by the pairwise_comparisons columns
+
+    """
+    tasks = ((metric, frame[value_col].to_numpy(), frame[group_col].to_numpy(), method, alpha)
+             for metric, frame in dataframe.groupby(metric_col, sort=True, observed=True))
+    if n_jobs == 1:
+        results = list(map(_metric_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_metric_task, tasks))
+    return pd.concat(results, ignore_index=True)
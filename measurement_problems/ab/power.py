@@ -0,0 +1,284 @@
+"""
+Vectorized power analysis and sample-size planning for t-tests and two-proportion z-tests.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "measurement_problems", "power")
+
+_BISECT_ITERATIONS = 60
+
+# Part of every PowerPlanner cache key: bump it whenever a formula changes, so stale results are not served.
+CACHE_VERSION = 2
+
+ALTERNATIVES = ("two-sided", "larger", "smaller")
+
+
+def _check_alternative(alternative):
+    if alternative not in ALTERNATIVES:
+        raise ValueError("alternative must be 'two-sided', 'larger' or 'smaller', got %r" % alternative)
+
+
+def _directed(effect, alternative):
+    # Effect in the direction of the alternative: a one-sided test only has power for a positive directed effect.
+    if alternative == "two-sided":
+        return np.abs(effect)
+    return effect if alternative == "larger" else -effect
+
+
+def _detectable(effect):
+    # Zero effects, and effects opposite to a one-sided alternative, cannot be planned for.
+    return np.where(effect > 0, effect, np.nan)
+
+
+def _z_alpha(alpha, alternative):
+    from scipy.stats import norm
+
+    _check_alternative(alternative)
+    return norm.ppf(1 - alpha / 2) if alternative == "two-sided" else norm.ppf(1 - alpha)
+
+
+def _bisect(f, lo, hi, target):
+    # Vectorized bisection of an increasing function: every grid cell is solved at once.
+    # Cells whose target is not reached at hi have no solution in (lo, hi) and are NaN.
+    lo, hi, target = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (lo, hi, target)))
+    lo, hi = lo.copy(), hi.copy()
+    reachable = f(hi) >= target
+    for _ in range(_BISECT_ITERATIONS):
+        mid = (lo + hi) / 2
+        below = f(mid) < target
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    return np.where(reachable, hi, np.nan)
+
+
+####################
+# Independent two sample t test
+####################
+
+def ttest_power(effect_size, n, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+
+    Power of the independent two sample t test, from the noncentral t distribution.
+
+    Parameters
+    ----------
+    effect_size: array-like
+        standardized difference in means (Cohen's d)
+    n: array-like
+        observations of the first group; the second group has ratio * n
+    alpha: float
+        significance level
+    ratio: float
+        second group size / first group size
+    alternative: str
+        "two-sided", "larger" (effect_size > 0) or "smaller" (effect_size < 0)
+
+    Returns
+    -------
+    power: np.ndarray, broadcast over the inputs
+
+    """
+    from scipy.stats import nct, t as t_dist
+
+    _check_alternative(alternative)
+    effect_size, n = np.asarray(effect_size, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    n2 = n * ratio
+    df = n + n2 - 2
+    ncp = effect_size * np.sqrt(n * n2 / (n + n2))
+    if alternative == "two-sided":
+        crit = t_dist.ppf(1 - alpha / 2, df)
+        # The lower tail as sf(crit, -ncp): nct.cdf returns NaN deep in its lower tail.
+        return nct.sf(crit, df, ncp) + nct.sf(crit, df, -ncp)
+    crit = t_dist.ppf(1 - alpha, df)
+    return nct.sf(crit, df, _directed(ncp, alternative))
+
+
+def ttest_sample_size(effect_size, power=0.8, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+    Observations needed in the first group (ceiled) to reach the power, for every effect size of the grid.
+    NaN where the effect is zero or opposite to a one-sided alternative.
+    """
+    from scipy.stats import norm
+
+    z = _z_alpha(alpha, alternative) + norm.ppf(power)
+    effect_size = _detectable(_directed(np.asarray(effect_size, dtype=np.float64), alternative))
+    # The directed effect is positive, so "smaller" is solved as "larger".
+    one_sided = "two-sided" if alternative == "two-sided" else "larger"
+    approx = (1 + 1 / ratio) * (z / effect_size) ** 2
+    n = _bisect(lambda n: ttest_power(effect_size, n, alpha, ratio, one_sided), 2.0, 2 * approx + 10, power)
+    return np.where(np.isnan(effect_size), np.nan, np.ceil(n))
+
+
+def ttest_mde(n, power=0.8, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+    Minimum detectable standardized effect size for every sample size of the grid; negative for "smaller".
+    """
+    from scipy.stats import norm
+
+    n = np.asarray(n, dtype=np.float64)
+    z = _z_alpha(alpha, alternative) + norm.ppf(power)
+    approx = z * np.sqrt((1 + 1 / ratio) / n)
+    one_sided = "two-sided" if alternative == "two-sided" else "larger"
+    mde = _bisect(lambda d: ttest_power(d, n, alpha, ratio, one_sided), 0.0, 2 * approx + 1, power)
+    return -mde if alternative == "smaller" else mde
+
+
+####################
+# Two proportion z test
+####################
+
+def _proportion_se(p1, p2, n, ratio):
+    n2 = n * ratio
+    p_pool = (p1 * n + p2 * n2) / (n + n2)
+    se_null = np.sqrt(p_pool * (1 - p_pool) * (1 / n + 1 / n2))
+    se_alt = np.sqrt(p1 * (1 - p1) / n + p2 * (1 - p2) / n2)
+    return se_null, se_alt
+
+
+def proportions_power(p1, p2, n, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+
+    Power of the two-proportion z test (normal approximation, pooled variance under H0).
+
+    Parameters
+    ----------
+    p1: array-like
+        baseline conversion rate
+    p2: array-like
+        conversion rate of the new variant
+    n: array-like
+        observations of the first group; the second group has ratio * n
+    alternative: str
+        "two-sided", "larger" (p2 > p1) or "smaller" (p2 < p1)
+
+    Returns
+    -------
+    power: np.ndarray, broadcast over the inputs
+
+    """
+    from scipy.stats import norm
+
+    z = _z_alpha(alpha, alternative)
+    p1, p2, n = (np.asarray(x, dtype=np.float64) for x in (p1, p2, n))
+    se_null, se_alt = _proportion_se(p1, p2, n, ratio)
+    return norm.cdf((_directed(p2 - p1, alternative) - z * se_null) / se_alt)
+
+
+def proportions_sample_size(p1, p2, power=0.8, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+    Observations needed in the first group (ceiled), closed form over the whole (p1, p2) grid.
+    NaN where p2 == p1 or the difference is opposite to a one-sided alternative.
+    """
+    from scipy.stats import norm
+
+    p1, p2 = np.asarray(p1, dtype=np.float64), np.asarray(p2, dtype=np.float64)
+    p_pool = (p1 + ratio * p2) / (1 + ratio)
+    numerator = (_z_alpha(alpha, alternative) * np.sqrt(p_pool * (1 - p_pool) * (1 + 1 / ratio)) +
+                 norm.ppf(power) * np.sqrt(p1 * (1 - p1) + p2 * (1 - p2) / ratio))
+    return np.ceil((numerator / _detectable(_directed(p2 - p1, alternative))) ** 2)
+
+
+def proportions_mde(p1, n, power=0.8, alpha=0.05, ratio=1.0, alternative="two-sided"):
+    """
+    Minimum detectable absolute lift p2 - p1 for every (baseline, sample size) of the grid;
+    positive (p2 > p1), or negative (p2 < p1) for alternative="smaller". NaN where no lift reaches the power.
+    """
+    _check_alternative(alternative)
+    p1, n = np.asarray(p1, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    sign, upper = (-1.0, p1) if alternative == "smaller" else (1.0, 1 - p1)
+    lift = _bisect(lambda lift: proportions_power(p1, p1 + sign * lift, n, alpha, ratio, alternative),
+                   0.0, upper - 1e-12, power)
+    return sign * lift
+
+
+class PowerPlanner:
+    """
+
+    Power, sample size and MDE planning over grids, memoized on disk.
+
+    - Every query is evaluated for the whole grid at once with array operations.
+    - Results are stored as .npy files keyed by a hash of CACHE_VERSION, the query and its arguments,
+      so repeated planning queries return without recomputation.
+
+    Parameters
+    ----------
+    cache_dir: str
+        directory of the memoized results; None disables the disk cache
+
+    """
+
+    FUNCTIONS = {function.__name__: function for function in (ttest_power, ttest_sample_size, ttest_mde,
+                                                              proportions_power, proportions_sample_size,
+                                                              proportions_mde)}
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, name, kwargs):
+        digest = hashlib.blake2b(("%d|%s|" % (CACHE_VERSION, name)).encode(), digest_size=16)
+        for argument in sorted(kwargs):
+            value = np.ascontiguousarray(kwargs[argument])
+            digest.update(("%s|%s|%s|" % (argument, value.dtype.str, value.shape)).encode())
+            digest.update(value.tobytes())
+        return digest.hexdigest()
+
+    def query(self, name, **kwargs):
+        """
+        Evaluates one of FUNCTIONS over the grid given by its broadcastable arguments, e.g.
+        planner.query("proportions_sample_size", p1=p1_grid, p2=p2_grid, power=0.8)
+        """
+        function = self.FUNCTIONS[name]
+        if self.cache_dir is None:
+            return function(**kwargs)
+
+        path = os.path.join(self.cache_dir, "%s-%s.npy" % (name, self._key(name, kwargs)))
+        if os.path.exists(path):
+            self.hits += 1
+            return np.load(path)
+
+        self.misses += 1
+        result = np.asarray(function(**kwargs))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # A private temporary file per writer, so concurrent writers of the same key never share one.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp.npy")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, result)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return result
+
+    def proportions_sample_size_grid(self, baselines, lifts, power=0.8, alpha=0.05, ratio=1.0,
+                                     alternative="two-sided", relative=True):
+        """
+        Sample size per group for every (baseline rate, lift) pair, as a baselines x lifts frame.
+        With relative=True lifts are relative (0.05 = +5%), otherwise absolute differences.
+        """
+        baselines = np.asarray(baselines, dtype=np.float64)[:, None]
+        lifts = np.asarray(lifts, dtype=np.float64)[None, :]
+        p2 = baselines * (1 + lifts) if relative else baselines + lifts
+        n = self.query("proportions_sample_size", p1=baselines, p2=p2, power=power, alpha=alpha,
+                       ratio=ratio, alternative=alternative)
+        return pd.DataFrame(n, index=pd.Index(baselines.ravel(), name="baseline"),
+                            columns=pd.Index(lifts.ravel(), name="lift"))
+
+    def ttest_sample_size_grid(self, effect_sizes, powers=(0.8,), alpha=0.05, ratio=1.0, alternative="two-sided"):
+        """
+        Sample size per group for every (effect size, power) pair, as an effect sizes x powers frame.
+        """
+        effect_sizes = np.asarray(effect_sizes, dtype=np.float64)[:, None]
+        powers = np.asarray(powers, dtype=np.float64)[None, :]
+        n = self.query("ttest_sample_size", effect_size=effect_sizes, power=powers, alpha=alpha,
+                       ratio=ratio, alternative=alternative)
+        return pd.DataFrame(n, index=pd.Index(effect_sizes.ravel(), name="effect_size"),
+                            columns=pd.Index(powers.ravel(), name="power"))
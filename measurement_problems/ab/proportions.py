@@ -0,0 +1,103 @@
+"""
+Vectorized two-proportion z-tests across many segments.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def proportions_ztest_batch(count1, nobs1, count2, nobs2, alternative="two-sided"):
+    """
+
+    Two-proportion z-test for every segment in one NumPy pass.
+
+    - Same statistic as statsmodels proportions_ztest(count=[count1, count2], nobs=[nobs1, nobs2]):
+      the variance uses the pooled proportion of both groups.
+
+    Parameters
+    ----------
+    count1, nobs1: array-like
+        success and observation counts of the first group
+    count2, nobs2: array-like
+        success and observation counts of the second group
+    alternative: str
+        "two-sided", "larger" (p1 > p2) or "smaller" (p1 < p2)
+
+    Returns
+    -------
+    zstat, pvalue: np.ndarray, np.ndarray
+
+    """
+    from scipy.stats import norm
+
+    count1, nobs1, count2, nobs2 = (np.asarray(x, dtype=np.float64) for x in (count1, nobs1, count2, nobs2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p1 = count1 / nobs1
+        p2 = count2 / nobs2
+        p_pool = (count1 + count2) / (nobs1 + nobs2)
+        zstat = (p1 - p2) / np.sqrt(p_pool * (1 - p_pool) * (1 / nobs1 + 1 / nobs2))
+
+    if alternative == "two-sided":
+        pvalue = 2 * norm.sf(np.abs(zstat))
+    elif alternative == "larger":
+        pvalue = norm.sf(zstat)
+    elif alternative == "smaller":
+        pvalue = norm.cdf(zstat)
+    else:
+        raise ValueError("alternative must be 'two-sided', 'larger' or 'smaller', got %r" % alternative)
+    return zstat, pvalue
+
+
+def proportion_counts(dataframe, group_cols, outcome_col):
+    """
+    Success and observation counts per group from a single groupby, e.g. survived by sex.
+    """
+    counts = dataframe.groupby(group_cols, observed=True)[outcome_col].agg(["sum", "count"])
+    return counts.rename(columns={"sum": "count", "count": "nobs"})
+
+
+def segment_proportions_ztest(dataframe, segment_cols, variant_col, outcome_col, variants=None,
+                              alternative="two-sided", alpha=0.05):
+    """
+
+    Two-proportion z-test between two variants inside every segment, e.g. country x device.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        one row per observation with a 0/1 outcome column
+    segment_cols: list of str
+        segment columns; an empty list tests the whole table
+    variant_col: str
+        variant column
+    outcome_col: str
+        0/1 outcome column, e.g. survived or converted
+    variants: tuple (first, second)
+        the two variants to compare; defaults to the two variant values in sorted order
+
+    Returns
+    -------
+    results: pd.DataFrame indexed by segment with the counts, proportions, zstat, pvalue and reject columns
+
+    """
+    segment_cols = list(segment_cols)
+    counts = proportion_counts(dataframe, segment_cols + [variant_col], outcome_col)
+    if variants is None:
+        variants = sorted(counts.index.get_level_values(variant_col).unique())
+        if len(variants) != 2:
+            raise ValueError("Expected exactly two variants in %r, got %s" % (variant_col, variants))
+    first, second = variants
+
+    if segment_cols:
+        wide = counts.unstack(variant_col, fill_value=0)
+        results = pd.DataFrame({"count1": wide[("count", first)], "nobs1": wide[("nobs", first)],
+                                "count2": wide[("count", second)], "nobs2": wide[("nobs", second)]})
+    else:
+        results = pd.DataFrame({"count1": [counts.loc[first, "count"]], "nobs1": [counts.loc[first, "nobs"]],
+                                "count2": [counts.loc[second, "count"]], "nobs2": [counts.loc[second, "nobs"]]})
+    results["p1"] = results["count1"] / results["nobs1"]
+    results["p2"] = results["count2"] / results["nobs2"]
+    results["zstat"], results["pvalue"] = proportions_ztest_batch(results["count1"], results["nobs1"],
+                                                                  results["count2"], results["nobs2"], alternative)
+    results["reject"] = results["pvalue"] < alpha
+    return results
@@ -0,0 +1,163 @@
+"""
+Vectorized, parallel bootstrap and permutation tests for the difference in means.
+"""
+
+import numpy as np
+
+from measurement_problems._util import MAX_BLOCK_BYTES, run_chunks
+
+# Metrics with at most this many distinct values (e.g. 1-5 star ratings) are resampled through their value counts.
+MAX_UNIQUE_VALUES = 1024
+CHUNK_RESAMPLES = 1000
+
+
+def _compress(values, resolution=None):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if resolution is not None:
+        values = np.round(values / resolution) * resolution
+    uniques, counts = np.unique(values, return_counts=True)
+    return values, uniques, counts
+
+
+def _check_arms(a, b):
+    # a and b are compressed observations; an arm without any non-NaN value cannot be resampled.
+    for name, values in (("a", a), ("b", b)):
+        if len(values) == 0:
+            raise ValueError("arm %r has no non-NaN observations" % name)
+
+
+def _block_rows(n, bytes_per_item=12, max_block_bytes=MAX_BLOCK_BYTES):
+    return max(1, max_block_bytes // (bytes_per_item * n))
+
+
+def _bootstrap_means(rng, size, values, uniques, counts):
+    n = len(values)
+    if uniques is not None:
+        # The mean of a bootstrap sample only depends on how often every distinct value is drawn:
+        # Multinomial(n, counts / n) over the distinct values, O(distinct values) per resample.
+        return rng.multinomial(n, counts / n, size=size) @ uniques / n
+
+    means = np.empty(size)
+    rows = _block_rows(n)
+    for start in range(0, size, rows):
+        stop = min(start + rows, size)
+        means[start:stop] = values[rng.integers(0, n, size=(stop - start, n), dtype=np.int32)].mean(axis=1)
+    return means
+
+
+def _bootstrap_chunk(task):
+    size, seed, a, b = task
+    rng = np.random.default_rng(seed)
+    return _bootstrap_means(rng, size, *a) - _bootstrap_means(rng, size, *b)
+
+
+def _permutation_chunk(task):
+    size, seed, n_a, pooled, uniques, counts = task
+    rng = np.random.default_rng(seed)
+    if uniques is not None:
+        # The sum of a relabelled group is a multivariate hypergeometric draw over the distinct values.
+        return rng.multivariate_hypergeometric(counts, n_a, size=size) @ uniques
+
+    sums = np.empty(size)
+    rows = _block_rows(len(pooled), bytes_per_item=16)
+    for start in range(0, size, rows):
+        stop = min(start + rows, size)
+        chosen = np.argpartition(rng.random((stop - start, len(pooled))), n_a - 1, axis=1)[:, :n_a]
+        sums[start:stop] = pooled[chosen].sum(axis=1)
+    return sums
+
+
+def _arm(values, resolution=None):
+    values, uniques, counts = _compress(values, resolution)
+    if len(uniques) > MAX_UNIQUE_VALUES:
+        uniques = counts = None
+    return values, uniques, counts
+
+
+def bootstrap_mean_diff(a, b, n_resamples=10_000, confidence=0.95, seed=None, n_jobs=1,
+                        chunk_resamples=CHUNK_RESAMPLES, resolution=None):
+    """
+
+    Percentile bootstrap confidence interval of mean(a) - mean(b).
+
+    - Resample indices are drawn as vectorized blocks of bounded memory (MAX_BLOCK_BYTES).
+    - Metrics with few distinct values (ratings) are resampled through multinomial value counts instead of indices.
+    - Chunks of resamples run on a process pool; every chunk has its own child seed of seed,
+      so the result is reproducible and independent of n_jobs.
+    - Only the value-count path takes seconds for 1e6 observations per arm. Continuous metrics take the index path,
+      which is O(n) per resample: about 3 s per 100 resamples at n=1e6 on one core, i.e. minutes for 10k resamples.
+      Use n_jobs=None to spread them over every CPU, or a resolution that rounds the metric to at most
+      MAX_UNIQUE_VALUES distinct values (e.g. 0.01 for amounts in cents) to take the value-count path.
+
+    Parameters
+    ----------
+    a, b: array-like
+        observations of the two groups, e.g. Rating of Progress > 75 and Progress < 25
+    n_resamples: int
+        number of bootstrap resamples
+    confidence: float
+        confidence level of the interval
+    seed: int
+        seed of the resampling
+    n_jobs: int
+        worker processes, 1 runs in the current process and None uses every CPU
+    resolution: float
+        observations are rounded to multiples of it before resampling; None keeps them exact
+
+    Returns
+    -------
+    result: dict with statistic, ci_low, ci_high and the bootstrap distribution
+
+    """
+    a, b = _arm(a, resolution), _arm(b, resolution)
+    _check_arms(a[0], b[0])
+    distribution = run_chunks(_bootstrap_chunk, n_resamples, seed, (a, b), n_jobs, chunk_resamples)
+    tail = (1 - confidence) / 2
+    ci_low, ci_high = np.quantile(distribution, [tail, 1 - tail])
+    return {"statistic": a[0].mean() - b[0].mean(), "ci_low": ci_low, "ci_high": ci_high,
+            "distribution": distribution}
+
+
+def permutation_test_mean_diff(a, b, n_resamples=10_000, alternative="two-sided", seed=None, n_jobs=1,
+                               chunk_resamples=CHUNK_RESAMPLES, resolution=None):
+    """
+
+    Permutation p-value of H0: the group labels do not matter, for the statistic mean(a) - mean(b).
+
+    - Same execution model as bootstrap_mean_diff: vectorized blocks, value-count shortcut and seeded chunks.
+    - The same limitation applies: continuous metrics are O(n) per resample (minutes for 10k resamples at n=1e6
+      on one core) unless n_jobs spreads them over CPUs or resolution brings them to the value-count path.
+
+    Parameters
+    ----------
+    alternative: str
+        "two-sided", "larger" (mean(a) > mean(b)) or "smaller"
+    resolution: float
+        observations are rounded to multiples of it before resampling; None keeps them exact
+
+    Returns
+    -------
+    result: dict with statistic and pvalue
+
+    """
+    a, _, _ = _compress(a, resolution)
+    b, _, _ = _compress(b, resolution)
+    _check_arms(a, b)
+    pooled, uniques, counts = _arm(np.concatenate([a, b]))
+    n_a, n_b, total = len(a), len(b), pooled.sum()
+
+    sums_a = run_chunks(_permutation_chunk, n_resamples, seed, (n_a, pooled, uniques, counts), n_jobs,
+                         chunk_resamples)
+    permuted = sums_a / n_a - (total - sums_a) / n_b
+    observed = a.mean() - b.mean()
+
+    if alternative == "two-sided":
+        extreme = np.abs(permuted) >= abs(observed) - 1e-12
+    elif alternative == "larger":
+        extreme = permuted >= observed - 1e-12
+    elif alternative == "smaller":
+        extreme = permuted <= observed + 1e-12
+    else:
+        raise ValueError("alternative must be 'two-sided', 'larger' or 'smaller', got %r" % alternative)
+    return {"statistic": observed, "pvalue": (extreme.sum() + 1) / (n_resamples + 1)}
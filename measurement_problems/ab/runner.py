@@ -0,0 +1,136 @@
+"""
+Batched hypothesis testing for many experiments and metrics.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+RESULT_COLUMNS = ["n_variants", "n_obs", "normal", "equal_var", "test", "statistic", "pvalue", "reject"]
+
+
+def choose_and_run_test(samples, alpha=0.05, cache=None):
+    """
+
+    Runs the assumption checks and the test chosen by them, as in ab_testing.py.
+
+    1. Normality of every group (shapiro) and homogeneity of variances (levene).
+    2. Two groups:
+       - normal: independent two sample t test, Welch's version when the variances are not homogeneous
+       - not normal: mannwhitneyu
+    3. More than two groups:
+       - normal and homogeneous: one way anova (f_oneway)
+       - otherwise: kruskal
+
+    Parameters
+    ----------
+    samples: list of np.ndarray
+        observations of every variant
+    alpha: float
+        significance level of the assumption checks and of the test
+    cache: AssumptionCache
+        optional cache of the shapiro and levene results
+
+    Returns
+    -------
+    result: dict with normal, equal_var, test, statistic, pvalue, reject
+
+    """
+    from scipy.stats import shapiro, levene, ttest_ind, mannwhitneyu, f_oneway, kruskal
+
+    # shapiro needs at least 3 observations; smaller groups are treated as not normal.
+    check_normal = shapiro if cache is None else cache.shapiro
+    check_equal_var = levene if cache is None else cache.levene
+    normal = all(len(sample) >= 3 and check_normal(sample)[1] >= alpha for sample in samples)
+    equal_var = check_equal_var(*samples)[1] >= alpha
+
+    if len(samples) == 2:
+        if normal:
+            test = "ttest_ind" if equal_var else "welch_ttest"
+            statistic, pvalue = ttest_ind(*samples, equal_var=equal_var)
+        else:
+            test = "mannwhitneyu"
+            statistic, pvalue = mannwhitneyu(*samples)
+    elif normal and equal_var:
+        test = "f_oneway"
+        statistic, pvalue = f_oneway(*samples)
+    else:
+        test = "kruskal"
+        statistic, pvalue = kruskal(*samples)
+
+    return {"normal": normal, "equal_var": equal_var, "test": test,
+            "statistic": float(statistic), "pvalue": float(pvalue), "reject": bool(pvalue < alpha)}
+
+
+def _run_task(task, cache=None):
+    key, samples, alpha = task
+    if len(samples) < 2:
+        result = {"normal": np.nan, "equal_var": np.nan, "test": None,
+                  "statistic": np.nan, "pvalue": np.nan, "reject": False}
+    else:
+        result = choose_and_run_test(samples, alpha, cache)
+    return key, {"n_variants": len(samples), "n_obs": sum(len(sample) for sample in samples), **result}
+
+
+def _tasks(dataframe, experiment_col, metric_col, variant_col, value_col, alpha):
+    # Grouped once: rows are ordered by (experiment, metric, variant) codes and split into contiguous blocks.
+    dataframe = dataframe[dataframe[value_col].notna()]
+    if dataframe.empty:
+        return
+    pair_codes = dataframe.groupby([experiment_col, metric_col], sort=True, observed=True).ngroup().to_numpy()
+    variant_codes = pd.factorize(dataframe[variant_col], sort=True)[0]
+    order = np.lexsort((variant_codes, pair_codes))
+    values = dataframe[value_col].to_numpy(dtype=np.float64)[order]
+    pair_codes, variant_codes = pair_codes[order], variant_codes[order]
+
+    keys = dataframe[[experiment_col, metric_col]].to_numpy()[order]
+    pair_starts = np.flatnonzero(np.r_[True, np.diff(pair_codes) != 0])
+    pair_ends = np.r_[pair_starts[1:], len(order)]
+    for start, end in zip(pair_starts, pair_ends):
+        cuts = np.flatnonzero(np.diff(variant_codes[start:end])) + 1
+        yield tuple(keys[start]), np.split(values[start:end], cuts), alpha
+
+
+def run_experiments(dataframe, experiment_col="experiment", metric_col="metric", variant_col="variant",
+                    value_col="value", alpha=0.05, n_jobs=1, chunksize=16, cache=None):
+    """
+
+    Tests every (experiment, metric) pair of a long-format table.
+
+    - The table is grouped once; every (experiment, metric) becomes one task with the observations of its variants.
+    - Tasks run in the current process by default; n_jobs != 1 spreads them over a process pool.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        long-format observations with experiment, metric, variant and value columns
+    alpha: float
+        significance level
+    n_jobs: int
+        number of worker processes, None uses every CPU; a process pool needs an
+        if __name__ == "__main__" guard in scripts under the spawn start method (macOS, Windows)
+    chunksize: int
+        number of tasks sent to a worker at once
+    cache: AssumptionCache
+        shapiro/levene cache shared across calls; it lives in this process, so it requires n_jobs=1
+
+    Returns
+    -------
+    results: pd.DataFrame indexed by (experiment, metric) with n_variants, n_obs, normal, equal_var,
+             test, statistic, pvalue and reject columns
+
+    """
+    if cache is not None and n_jobs != 1:
+        raise ValueError("An assumption cache can only be used with n_jobs=1")
+    tasks = _tasks(dataframe, experiment_col, metric_col, variant_col, value_col, alpha)
+    if n_jobs == 1:
+        results = [_run_task(task, cache) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_run_task, tasks, chunksize=chunksize))
+
+    # An empty or all-NaN table gives an empty result with the same columns.
+    index = pd.MultiIndex.from_tuples([key for key, _ in results], names=[experiment_col, metric_col]) \
+        if results else pd.MultiIndex.from_arrays([[], []], names=[experiment_col, metric_col])
+    return pd.DataFrame([result for _, result in results], index=index, columns=RESULT_COLUMNS)
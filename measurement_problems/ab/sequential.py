@@ -0,0 +1,158 @@
+"""
+Sequential, always-valid A/B monitoring with the mixture sequential probability ratio test (mSPRT).
+"""
+
+import abc
+import math
+
+import numpy as np
+
+
+class ArmState:
+    """
+    O(1) running count, mean and M2 of one arm, updated batch by batch with the parallel Welford formula.
+    """
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            mean_b = values.mean()
+            self.update_moments(len(values), mean_b, ((values - mean_b) ** 2).sum())
+        return self
+
+    def update_counts(self, successes, nobs):
+        # A batch of 0/1 observations given as counts.
+        if nobs:
+            self.update_moments(nobs, successes / nobs, successes * (1 - successes / nobs))
+        return self
+
+    def update_moments(self, n_b, mean_b, m2_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+
+class _MixtureSPRT(abc.ABC):
+    """
+    Always-valid p-value of H0: mean_b - mean_a = 0 under a normal mixture N(0, tau ** 2) on the difference.
+    """
+
+    def __init__(self, tau, alpha=0.05, min_samples=100):
+        self.tau = tau
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.a = ArmState()
+        self.b = ArmState()
+        self.pvalue = 1.0
+        self.likelihood_ratio = 1.0
+
+    @abc.abstractmethod
+    def _variance(self):
+        """
+        Variance of the difference of the two arm means.
+        """
+
+    def _check(self):
+        if min(self.a.n, self.b.n) >= self.min_samples:
+            variance = self._variance()
+            if variance > 0:
+                tau2 = self.tau * self.tau
+                difference = self.b.mean - self.a.mean
+                log_lr = 0.5 * math.log(variance / (variance + tau2)) + \
+                    difference * difference * tau2 / (2 * variance * (variance + tau2))
+                self.likelihood_ratio = math.exp(min(log_lr, 700.0))
+                # The always-valid p-value never increases, so it can be checked after every batch.
+                self.pvalue = min(self.pvalue, 1.0 / self.likelihood_ratio)
+        return self.result()
+
+    @property
+    def reject(self):
+        return self.pvalue <= self.alpha
+
+    def result(self):
+        return {"n_a": self.a.n, "n_b": self.b.n, "mean_a": self.a.mean, "mean_b": self.b.mean,
+                "difference": self.b.mean - self.a.mean, "likelihood_ratio": self.likelihood_ratio,
+                "pvalue": self.pvalue, "reject": self.reject}
+
+
+class SequentialMeanTest(_MixtureSPRT):
+    """
+
+    Streaming two-sample mean test (e.g. total_bill of smokers vs non-smokers) that may be checked after every batch.
+
+    - Each arm keeps O(1) state: count, mean and M2.
+    - After every batch the mSPRT likelihood ratio and the always-valid p-value are updated in O(1);
+      stopping as soon as pvalue <= alpha keeps the type I error at alpha, unlike repeated ttest_ind calls.
+
+    Parameters
+    ----------
+    tau: float
+        standard deviation of the mixing distribution, on the scale of the expected difference in means;
+        the default of 1.0 suits differences of about one unit (e.g. one dollar of total_bill)
+    alpha: float
+        significance level
+    min_samples: int
+        observations per arm before the variance estimate is trusted
+
+    """
+
+    def __init__(self, tau=1.0, alpha=0.05, min_samples=100):
+        super().__init__(tau, alpha, min_samples)
+
+    def _variance(self):
+        return self.a.var / self.a.n + self.b.var / self.b.n
+
+    def update(self, a=(), b=()):
+        """
+        Ingests a batch of observations per arm; returns the current result.
+        """
+        self.a.update(a)
+        self.b.update(b)
+        return self._check()
+
+
+class SequentialProportionTest(_MixtureSPRT):
+    """
+
+    Streaming two-proportion test (e.g. conversion of old vs new design) that may be checked after every batch.
+
+    Parameters
+    ----------
+    tau: float
+        standard deviation of the mixing distribution, on the scale of the expected difference in proportions;
+        the default of 0.05 suits lifts of a few percentage points
+    alpha: float
+        significance level
+    min_samples: int
+        observations per arm before the variance estimate is trusted
+
+    """
+
+    def __init__(self, tau=0.05, alpha=0.05, min_samples=100):
+        super().__init__(tau, alpha, min_samples)
+
+    def _variance(self):
+        p_a, p_b = self.a.mean, self.b.mean
+        return p_a * (1 - p_a) / self.a.n + p_b * (1 - p_b) / self.b.n
+
+    def update(self, successes_a=0, nobs_a=0, successes_b=0, nobs_b=0):
+        """
+        Ingests a batch given as success and observation counts per arm; returns the current result.
+        """
+        self.a.update_counts(successes_a, nobs_a)
+        self.b.update_counts(successes_b, nobs_b)
+        return self._check()
@@ -0,0 +1,62 @@
+"""
+Deterministic, parallel simulation of sampling distributions.
+"""
+
+import numpy as np
+
+from measurement_problems._util import MAX_BLOCK_BYTES, run_chunks
+
+REDUCERS = {"mean": np.mean, "median": np.median, "std": np.std, "var": np.var, "sum": np.sum}
+
+
+def _draw(rng, population, shape):
+    if callable(population):
+        return population(rng, shape)
+    return rng.choice(population, size=shape, replace=True)
+
+
+def _simulation_chunk(task):
+    size, seed, population, n, reducer = task
+    rng = np.random.default_rng(seed)
+    return np.asarray(reducer(_draw(rng, population, (size, n)), axis=1))
+
+
+def simulate_sampling_distribution(population, n, n_samples, reducer="mean", seed=None, n_jobs=1,
+                                   max_block_bytes=MAX_BLOCK_BYTES):
+    """
+
+    Sampling distribution of a statistic: n_samples samples of size n, each reduced to one value.
+
+    - Samples are drawn as (samples x n) blocks with the numpy.random.Generator API,
+      block size is bounded by max_block_bytes.
+    - Every block has its own child of SeedSequence(seed), so results are reproducible
+      and identical for any n_jobs; blocks run on a process pool when n_jobs != 1.
+
+    Parameters
+    ----------
+    population: array-like or callable
+        values sampled with replacement, or a callable (rng, shape) -> array, e.g. lambda rng, shape: rng.normal(size=shape);
+        callables must be picklable (module level functions) when n_jobs != 1
+    n: int
+        sample size
+    n_samples: int
+        number of samples, e.g. 1_000_000
+    reducer: str or callable
+        "mean", "median", "std", "var", "sum" or a function accepting axis=1
+    seed: int
+        seed of the simulation
+    n_jobs: int
+        worker processes, 1 runs in the current process and None uses every CPU
+    max_block_bytes: int
+        memory bound of one block of samples
+
+    Returns
+    -------
+    distribution: np.ndarray of n_samples reduced values
+
+    """
+    reducer = REDUCERS[reducer] if isinstance(reducer, str) else reducer
+    if not callable(population):
+        population = np.asarray(population)
+    block_samples = max(1, max_block_bytes // (8 * n))
+    return run_chunks(_simulation_chunk, n_samples, seed, (population, n, reducer), n_jobs, block_samples)
@@ -0,0 +1,150 @@
+"""
+Mergeable per-group sufficient statistics and the tests that can be computed from them alone.
+"""
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.ab.proportions import proportions_ztest_batch
+
+STAT_COLUMNS = ["n", "mean", "m2"]
+
+
+def _aggregate(dataframe, group_cols, value_col):
+    grouped = dataframe.groupby(group_cols, observed=True)[value_col]
+    table = grouped.agg(["count", "mean", "var"]).rename(columns={"count": "n"})
+    table["m2"] = table.pop("var").fillna(0.0) * (table["n"] - 1)
+    return table[STAT_COLUMNS]
+
+
+def combine(tables, levels=None):
+    """
+
+    Merges (n, mean, m2) tables with Chan et al.'s parallel formula, group by group.
+
+    - m2 is the sum of squared deviations from the mean (Welford's M2), which stays stable where
+      sum of squares - n * mean ** 2 would cancel catastrophically.
+
+    Parameters
+    ----------
+    tables: list of pd.DataFrame
+        tables with n, mean and m2 columns
+    levels: list
+        index levels to keep; the other levels are merged away (e.g. collapsing time windows)
+
+    Returns
+    -------
+    table: pd.DataFrame with n, mean and m2 columns
+
+    """
+    stacked = pd.concat(tables)
+    levels = list(range(stacked.index.nlevels)) if levels is None else levels
+    grouped = stacked.groupby(level=levels, observed=True)
+
+    n = grouped["n"].transform("sum")
+    mean = (stacked["n"] * stacked["mean"]).groupby(level=levels, observed=True).transform("sum") / n
+    stacked = stacked.assign(nmean=stacked["n"] * stacked["mean"],
+                             m2=stacked["m2"] + stacked["n"] * (stacked["mean"] - mean) ** 2)
+
+    merged = stacked.groupby(level=levels, observed=True)[["n", "nmean", "m2"]].sum()
+    merged["mean"] = merged.pop("nmean") / merged["n"]
+    return merged[STAT_COLUMNS]
+
+
+class SufficientStatsStore:
+    """
+
+    Per-group count, mean and M2 of a metric, so tests never need to rescan raw events.
+
+    - Partitions and time windows are merged in O(groups) with the parallel Welford formula.
+    - sum and sum of squares are derived from (n, mean, m2) when needed.
+    - Student/Welch t-tests, one-way ANOVA and two-proportion z-tests (for 0/1 metrics) are computed
+      from the aggregates alone.
+
+    Parameters
+    ----------
+    group_cols: list of str
+        group columns, e.g. ["experiment", "variant"] or ["date", "variant"]
+
+    """
+
+    def __init__(self, group_cols):
+        self.group_cols = list(group_cols)
+        self.table = None
+
+    @classmethod
+    def from_dataframe(cls, dataframe, group_cols, value_col):
+        return cls(group_cols).update(dataframe, value_col)
+
+    def update(self, dataframe, value_col):
+        """
+        Adds the observations of a new partition or time window.
+        """
+        partial = _aggregate(dataframe.dropna(subset=[value_col]), self.group_cols, value_col)
+        self.table = partial if self.table is None else combine([self.table, partial])
+        return self
+
+    def merge(self, other):
+        if other.group_cols != self.group_cols:
+            raise ValueError("Stores with different group columns can not be merged: %s != %s"
+                             % (self.group_cols, other.group_cols))
+        if other.table is not None:
+            self.table = other.table.copy() if self.table is None else combine([self.table, other.table])
+        return self
+
+    def rollup(self, group_cols):
+        """
+        A new store grouped by a subset of the group columns, e.g. merging every date window of a variant.
+        """
+        store = SufficientStatsStore(group_cols)
+        store.table = combine([self.table], levels=[self.group_cols.index(col) for col in group_cols])
+        return store
+
+    def summary(self):
+        """
+        n, mean, m2 with the derived sum, sum_sq, var and std per group.
+        """
+        table = self.table.copy()
+        table["sum"] = table["n"] * table["mean"]
+        table["sum_sq"] = table["m2"] + table["n"] * table["mean"] ** 2
+        table["var"] = table["m2"] / (table["n"] - 1)
+        table["std"] = np.sqrt(table["var"])
+        return table
+
+    def _row(self, key):
+        row = self.table.loc[key]
+        return row["n"], row["mean"], np.sqrt(row["m2"] / (row["n"] - 1))
+
+    def ttest(self, a, b, equal_var=True):
+        """
+        Same result as ttest_ind(values of group a, values of group b, equal_var=equal_var).
+        """
+        from scipy.stats import ttest_ind_from_stats
+
+        n1, mean1, std1 = self._row(a)
+        n2, mean2, std2 = self._row(b)
+        return ttest_ind_from_stats(mean1, std1, n1, mean2, std2, n2, equal_var=equal_var)
+
+    def anova(self, keys=None):
+        """
+        Same result as f_oneway over the given groups (default: every group); returns (F, p-value).
+        """
+        from scipy.stats import f as f_dist
+
+        table = self.table if keys is None else self.table.loc[list(keys)]
+        n, mean, m2 = table["n"].to_numpy(float), table["mean"].to_numpy(float), table["m2"].to_numpy(float)
+        k, total = len(n), n.sum()
+        grand_mean = (n * mean).sum() / total
+        ss_between = (n * (mean - grand_mean) ** 2).sum()
+        ss_within = m2.sum()
+        f_stat = (ss_between / (k - 1)) / (ss_within / (total - k))
+        return f_stat, f_dist.sf(f_stat, k - 1, total - k)
+
+    def proportions_ztest(self, a, b, alternative="two-sided"):
+        """
+        Two-proportion z-test for a 0/1 metric; the success count of a group is its sum.
+        """
+        n1, mean1, _ = self._row(a)
+        n2, mean2, _ = self._row(b)
+        zstat, pvalue = proportions_ztest_batch(round(n1 * mean1), n1, round(n2 * mean2), n2, alternative)
+        return float(zstat), float(pvalue)
@@ -0,0 +1,68 @@
+"""
+Bayesian Average Rating (BAR) engine over star-count matrices.
+"""
+
+import numpy as np
+
+from measurement_problems._stats import z_quantile
+
+
+def bayesian_average_rating_matrix(counts, confidence=0.95):
+    """
+
+    Vectorized Bayesian Average Rating Score calculation
+
+    - Every row holds the observation frequencies of the star values, ordered from 1 star to K stars.
+      e.g. the 5 "1_point"..."5_point" product columns or the 10 "one"..."ten" IMDB columns.
+    - All rows are scored in a single pass; rows without any observation are scored as 0.
+
+    Parameters
+    ----------
+    counts: array-like of shape (N, K) or (K,)
+        star observation frequencies (np.ndarray, pd.DataFrame, list of lists)
+    confidence: float
+        confidence
+
+    Returns
+    -------
+    bar scores: np.ndarray of shape (N,), or float when a single row is given
+
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    single = counts.ndim == 1
+    counts = np.atleast_2d(counts)
+
+    K = counts.shape[1]
+    stars = np.arange(1, K + 1, dtype=np.float64)
+    N = counts.sum(axis=1)
+    total = N + K
+    z = z_quantile(confidence)
+
+    smoothed = counts + 1
+    first_part = smoothed @ stars / total
+    second_part = smoothed @ (stars * stars) / total
+    variance = np.maximum(second_part - first_part * first_part, 0.0)
+    scores = first_part - z * np.sqrt(variance / (total + 1))
+    scores[N == 0] = 0.0
+
+    return float(scores[0]) if single else scores
+
+
+def bayesian_average_rating(n, confidence=0.95):
+    """
+
+    Bayesian Average Rating Score calculation for a single star distribution.
+
+    Parameters
+    ----------
+    n: array-like of shape (K,)
+        star observation frequencies, from 1 star to K stars
+    confidence: float
+        confidence
+
+    Returns
+    -------
+    bar score: float
+
+    """
+    return bayesian_average_rating_matrix(n, confidence)
@@ -0,0 +1,188 @@
+"""
+On-disk columnar cache for parsed datasets and their derived score columns.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from measurement_problems.course_rating import add_days
+from measurement_problems.imdb import M, add_movie_scores
+from measurement_problems.loaders import DATASETS, read_dataset
+from measurement_problems.sorting import add_product_scores
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "measurement_problems")
+
+_BLOCK_SIZE = 1 << 20
+
+# Part of every cache key: bump it whenever the scoring code or the cache layout changes, so old frames are not served.
+CACHE_VERSION = 2
+
+
+def _feather():
+    try:
+        import pyarrow.feather as feather
+    except ImportError as exc:
+        raise ImportError("The score cache needs pyarrow: pip install pyarrow") from exc
+    return feather
+
+
+def source_fingerprint(path, content_hash=False):
+    """
+
+    Fingerprint of a source file.
+
+    - By default the file size and modification time are used, which is enough to detect a new export
+      without reading tens of GB on every warm start.
+    - With content_hash=True the whole file content is hashed instead.
+
+    Returns
+    -------
+    fingerprint: str
+
+    """
+    if not content_hash:
+        stat = os.stat(path)
+        return "%d-%d" % (stat.st_size, stat.st_mtime_ns)
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """
+
+    Arrow (Feather v2) cache of parsed datasets and derived score columns.
+
+    - An entry is keyed by a hash of CACHE_VERSION, the source file fingerprint and the scoring parameters
+      (weights, confidence, M, C, current_date, loader dtypes ...).
+    - Entries are stored uncompressed, so a warm start reads the cached columns straight from the Arrow file
+      instead of parsing the CSV; to_pandas still copies them into a new frame.
+    - The file name also carries a generation id of CACHE_VERSION and the source fingerprint. When a new entry is
+      written, only the entries of the same source and name from another generation are removed, so entries of
+      other parameter sets of the current source stay warm.
+
+    Parameters
+    ----------
+    cache_dir: str
+        directory of the cache files
+    content_hash: bool
+        hash the source file content instead of its size and modification time
+
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, content_hash=False):
+        self.cache_dir = cache_dir
+        self.content_hash = content_hash
+
+    def _prefix(self, source, name):
+        source_id = hashlib.blake2b(os.path.abspath(source).encode(), digest_size=6).hexdigest()
+        return "%s-%s-" % (name, source_id)
+
+    def _generation(self, fingerprint):
+        return hashlib.blake2b(("%d|%s" % (CACHE_VERSION, fingerprint)).encode(), digest_size=6).hexdigest()
+
+    def key(self, source, params, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = source_fingerprint(source, self.content_hash)
+        payload = json.dumps({"version": CACHE_VERSION, "source": fingerprint, "params": params},
+                             sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def path(self, source, name, params):
+        fingerprint = source_fingerprint(source, self.content_hash)
+        return os.path.join(self.cache_dir, "%s%s-%s.arrow" % (self._prefix(source, name),
+                                                               self._generation(fingerprint),
+                                                               self.key(source, params, fingerprint)))
+
+    def get_or_compute(self, source, name, params, compute, columns=None):
+        """
+
+        Returns the cached frame for (source, name, params), or builds and caches it with compute().
+
+        Parameters
+        ----------
+        source: str
+            source csv path
+        name: str
+            name of the cached view, e.g. "product_scores"
+        params: dict
+            JSON serializable scoring parameters that the cached columns depend on
+        compute: callable
+            builds the frame from scratch, called only on a cache miss
+        columns: list of str
+            only read these columns from a warm entry
+
+        Returns
+        -------
+        dataframe: pd.DataFrame with a fresh RangeIndex, on a cache hit and on a miss alike
+
+        """
+        feather = _feather()
+        path = self.path(source, name, params)
+        if os.path.exists(path):
+            return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+        dataframe = compute().reset_index(drop=True)
+        self._write(feather, source, name, path, dataframe)
+        return dataframe if columns is None else dataframe[columns]
+
+    def _write(self, feather, source, name, path, dataframe):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        feather.write_feather(dataframe, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+        # Entries of an older source fingerprint or CACHE_VERSION are stale; other params of this one are not.
+        prefix = self._prefix(source, name)
+        current = os.path.basename(path).rsplit("-", 1)[0] + "-"
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.startswith(prefix) and file_name.endswith(".arrow") and not file_name.startswith(current):
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".arrow"):
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+
+def cached_course_reviews(path, current_date, cache=None, columns=None):
+    """
+    course_reviews with parsed timestamps and the days column.
+    """
+    cache = ScoreCache() if cache is None else cache
+    current_date = pd.Timestamp(current_date)
+    return cache.get_or_compute(path, "course_reviews", {"current_date": current_date.isoformat(),
+                                                         "loader": DATASETS["course_reviews"]},
+                                lambda: add_days(read_dataset(path, "course_reviews"), current_date),
+                                columns=columns)
+
+
+def cached_product_scores(path, cache=None, columns=None, w1=32, w2=26, w3=42, bar_w=60, wss_w=40,
+                          confidence=0.95):
+    """
+    product_sorting with purchase_count_scaled, comment_count_scaled, bar_score,
+    weighted_sorting_score and hybrid_sorting_score columns.
+    """
+    cache = ScoreCache() if cache is None else cache
+    params = {"w1": w1, "w2": w2, "w3": w3, "bar_w": bar_w, "wss_w": wss_w, "confidence": confidence}
+    return cache.get_or_compute(path, "product_scores", {**params, "loader": DATASETS["product_sorting"]},
+                                lambda: add_product_scores(read_dataset(path, "product_sorting"), **params),
+                                columns=columns)
+
+
+def cached_movie_scores(path, cache=None, columns=None, M=M, C=None):
+    """
+    movies_metadata with the weighted_rating column; C defaults to the mean vote_average.
+    """
+    cache = ScoreCache() if cache is None else cache
+    return cache.get_or_compute(path, "movie_scores", {"M": M, "C": C, "loader": DATASETS["movies_metadata"]},
+                                lambda: add_movie_scores(read_dataset(path, "movies_metadata"), M, C),
+                                columns=columns)
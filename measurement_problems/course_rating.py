@@ -0,0 +1,510 @@
+"""
+Time and user based weighted course ratings.
+"""
+
+import heapq
+import math
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems._util import to_days
+
+# Upper edges (inclusive) of the first three buckets; the last bucket is open ended.
+# Time buckets: days <= 30, 30 < days <= 90, 90 < days <= 180, days > 180
+# Progress buckets: progress <= 10, 10 < progress <= 45, 45 < progress <= 75, progress > 75
+TIME_BUCKET_EDGES = (30, 90, 180)
+PROGRESS_BUCKET_EDGES = (10, 45, 75)
+
+TIME_WEIGHTS = (28, 26, 24, 22)
+USER_WEIGHTS = (22, 24, 26, 28)
+
+
+def _bucket(value, edges):
+    return bisect_left(edges, value)
+
+
+def _is_nan(value):
+    return value != value
+
+
+def _weighted_mean(sums, counts, weights):
+    # An empty bucket has no mean, same as dataframe.loc[<empty mask>, 'Rating'].mean().
+    return sum((s / c if c else math.nan) * w / 100 for s, c, w in zip(sums, counts, weights))
+
+
+class CourseRatingAccumulator:
+    """
+
+    Streaming course_weighted_rating for a single course.
+
+    - Keeps a running rating sum and count per time bucket and per progress bucket,
+      so add_review is O(log n) and the weighted score is O(1) on demand.
+    - When the current date advances, only the oldest reviews of each time bucket are inspected
+      and moved to the next bucket lazily; the full review history is never rescanned.
+
+    Parameters
+    ----------
+    current_date: str, datetime or pd.Timestamp
+        reference date used to compute how many days ago a review was made (defaults to now)
+    time_weights: tuple of 4 numbers
+        weights of the time buckets, in percent
+    user_weights: tuple of 4 numbers
+        weights of the progress buckets, in percent
+
+    """
+
+    def __init__(self, current_date=None, time_weights=TIME_WEIGHTS, user_weights=USER_WEIGHTS):
+        self.current_date = pd.Timestamp.now() if current_date is None else pd.Timestamp(current_date)
+        self.time_weights = tuple(time_weights)
+        self.user_weights = tuple(user_weights)
+
+        n_time = len(TIME_BUCKET_EDGES) + 1
+        n_user = len(PROGRESS_BUCKET_EDGES) + 1
+        self.time_sums = [0.0] * n_time
+        self.time_counts = [0] * n_time
+        self.user_sums = [0.0] * n_user
+        self.user_counts = [0] * n_user
+
+        # Per time bucket min-heap of (timestamp, seq, rating): the oldest review is the next to migrate.
+        self._time_heaps = [[] for _ in range(n_time - 1)]
+        self._seq = 0
+
+    @classmethod
+    def from_dataframe(cls, dataframe, current_date=None, **kwargs):
+        """
+        Builds an accumulator from a reviews frame with Rating, Timestamp and Progress columns.
+        """
+        accumulator = cls(current_date, **kwargs)
+        timestamps = pd.to_datetime(dataframe['Timestamp'])
+        for rating, timestamp, progress in zip(dataframe['Rating'], timestamps, dataframe['Progress']):
+            accumulator.add_review(rating, timestamp, progress)
+        return accumulator
+
+    def __len__(self):
+        return sum(self.time_counts)
+
+    def _days(self, timestamp):
+        return (self.current_date - timestamp).days
+
+    def add_review(self, rating, timestamp, progress):
+        """
+        Adds a single review event.
+
+        A NaN rating is ignored and a NaN progress leaves the review out of the progress buckets,
+        as the boolean masks and .mean() of AverageCalculation.py do.
+        """
+        rating = float(rating)
+        if _is_nan(rating):
+            return
+        timestamp = pd.Timestamp(timestamp)
+
+        time_bucket = _bucket(self._days(timestamp), TIME_BUCKET_EDGES)
+        self.time_sums[time_bucket] += rating
+        self.time_counts[time_bucket] += 1
+        if time_bucket < len(self._time_heaps):
+            heapq.heappush(self._time_heaps[time_bucket], (timestamp, self._seq, rating))
+            self._seq += 1
+
+        if _is_nan(progress):
+            return
+        user_bucket = _bucket(progress, PROGRESS_BUCKET_EDGES)
+        self.user_sums[user_bucket] += rating
+        self.user_counts[user_bucket] += 1
+
+    def advance_to(self, current_date):
+        """
+        Moves the reference date forward and migrates the reviews that crossed a time bucket edge.
+        """
+        current_date = pd.Timestamp(current_date)
+        if current_date < self.current_date:
+            raise ValueError("current_date can only move forward: %s < %s" % (current_date, self.current_date))
+        self.current_date = current_date
+
+        for bucket, edge in enumerate(TIME_BUCKET_EDGES):
+            heap = self._time_heaps[bucket]
+            while heap and self._days(heap[0][0]) > edge:
+                timestamp, seq, rating = heapq.heappop(heap)
+                self.time_sums[bucket] -= rating
+                self.time_counts[bucket] -= 1
+
+                # A review can skip buckets after a large jump of the current date.
+                target = _bucket(self._days(timestamp), TIME_BUCKET_EDGES)
+                self.time_sums[target] += rating
+                self.time_counts[target] += 1
+                if target < len(self._time_heaps):
+                    heapq.heappush(self._time_heaps[target], (timestamp, seq, rating))
+
+    def time_based_weighted_average(self):
+        return _weighted_mean(self.time_sums, self.time_counts, self.time_weights)
+
+    def user_based_weighted_average(self):
+        return _weighted_mean(self.user_sums, self.user_counts, self.user_weights)
+
+    def course_weighted_rating(self, time_w=50, user_w=50):
+        return self.time_based_weighted_average() * time_w / 100 + self.user_based_weighted_average() * user_w / 100
+
+
+def add_days(dataframe, current_date):
+    """
+    Adds the days column (how many days ago each review was made) to a reviews frame, in place.
+    """
+    dataframe['Timestamp'] = pd.to_datetime(dataframe['Timestamp'])
+    dataframe['days'] = (pd.Timestamp(current_date) - dataframe['Timestamp']).dt.days
+    return dataframe
+
+
+def _bucket_weighted_mean(ratings, values, edges, weights):
+    # Rows with a NaN rating or value are in no bucket, like the boolean masks and .mean() of AverageCalculation.py.
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~(np.isnan(ratings) | np.isnan(values))
+    buckets = np.digitize(values[valid], edges, right=True)
+    n_buckets = len(edges) + 1
+    sums = np.bincount(buckets, weights=ratings[valid], minlength=n_buckets)
+    counts = np.bincount(buckets, minlength=n_buckets)
+    return _weighted_mean(sums.tolist(), counts.tolist(), weights)
+
+
+def time_based_weighted_average(dataframe, weights=TIME_WEIGHTS):
+    """
+    Weighted mean of the Rating column over the time buckets of the days column, for a single course.
+    """
+    return _bucket_weighted_mean(dataframe['Rating'].to_numpy(np.float64), dataframe['days'].to_numpy(),
+                                 TIME_BUCKET_EDGES, weights)
+
+
+def user_based_weighted_average(dataframe, weights=USER_WEIGHTS):
+    """
+    Weighted mean of the Rating column over the progress buckets of the Progress column, for a single course.
+    """
+    return _bucket_weighted_mean(dataframe['Rating'].to_numpy(np.float64), dataframe['Progress'].to_numpy(),
+                                 PROGRESS_BUCKET_EDGES, weights)
+
+
+def course_weighted_rating(dataframe, time_w=50, user_w=50, time_weights=TIME_WEIGHTS, user_weights=USER_WEIGHTS):
+    """
+
+    Time and user based weighted rating of a single course.
+
+    - Same result as the course_weighted_rating function of AverageCalculation.py, with one bucket pass per column
+      instead of one boolean mask per bucket.
+    - Rows with a NaN Rating are skipped, and rows with NaN days or Progress are left out of that column's buckets,
+      as the boolean masks and .mean() of the script do.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        reviews of the course with Rating, Progress and days columns
+    time_w: float
+        weight of the time based average, in percent
+    user_w: float
+        weight of the user based average, in percent
+    time_weights: tuple of 4 numbers
+        weights of the time buckets, in percent
+    user_weights: tuple of 4 numbers
+        weights of the progress buckets, in percent
+
+    Returns
+    -------
+    weighted rating: float
+
+    """
+    return time_based_weighted_average(dataframe, time_weights) * time_w / 100 + \
+        user_based_weighted_average(dataframe, user_weights) * user_w / 100
+
+
+# Bucket of a NaN days or Progress value: kept in the aggregate, left out of that column's average.
+_NO_BUCKET = -1
+
+
+def _digitize(values, edges):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), _NO_BUCKET, np.digitize(values, edges, right=True))
+
+
+def _unstack_buckets(aggregate, n_buckets):
+    # (course, bucket) sums and counts -> (course x bucket) frames with every bucket present; _NO_BUCKET is dropped.
+    buckets = range(n_buckets)
+    return (aggregate['sum'].unstack(fill_value=0).reindex(columns=buckets, fill_value=0),
+            aggregate['count'].unstack(fill_value=0).reindex(columns=buckets, fill_value=0))
+
+
+def _grouped_weighted_mean(sums, counts, weights):
+    # sums and counts are (course x bucket) frames; an empty bucket makes the course score NaN.
+    means = sums / counts.where(counts > 0)
+    return means.mul([w / 100 for w in weights], axis=1).sum(axis=1, skipna=False)
+
+
+def course_bucket_aggregate(dataframe, course_col, current_date=None):
+    """
+
+    Rating sums and counts per (course, time bucket, progress bucket).
+
+    - Buckets are assigned once with np.digitize for the whole reviews table.
+    - Rows with NaN days or Progress get bucket -1 in that column, so they only count in the other average,
+      as with the boolean masks of AverageCalculation.py; NaN ratings are skipped by sum and count.
+    - Aggregates of different chunks or partitions can be merged with pd.concat(...).groupby(level=[0, 1, 2]).sum().
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        reviews with Rating, Progress and either days or Timestamp columns
+    course_col: str
+        name of the course id column
+    current_date: str, datetime or pd.Timestamp
+        when given, days are computed from Timestamp; otherwise the existing days column is used
+
+    Returns
+    -------
+    aggregate: pd.DataFrame with sum and count columns and a (course, time bucket, progress bucket) index
+
+    """
+    if current_date is None:
+        days = dataframe['days'].to_numpy()
+    else:
+        days = (pd.Timestamp(current_date) - pd.to_datetime(dataframe['Timestamp'])).dt.days.to_numpy()
+
+    time_bucket = _digitize(days, TIME_BUCKET_EDGES)
+    user_bucket = _digitize(dataframe['Progress'].to_numpy(), PROGRESS_BUCKET_EDGES)
+
+    aggregate = (dataframe['Rating']
+                 .astype(np.float64)
+                 .groupby([dataframe[course_col].to_numpy(), time_bucket, user_bucket], sort=False, observed=True)
+                 .agg(['sum', 'count']))
+    aggregate.index.names = [course_col, 'time_bucket', 'user_bucket']
+    return aggregate
+
+
+def course_weighted_rating_from_aggregate(aggregate, time_weights=TIME_WEIGHTS, user_weights=USER_WEIGHTS,
+                                          time_w=50, user_w=50):
+    """
+    Weighted rating per course from a course_bucket_aggregate result.
+    """
+    by_time = aggregate.groupby(level=[0, 1]).sum()
+    by_user = aggregate.groupby(level=[0, 2]).sum()
+
+    time_avg = _grouped_weighted_mean(*_unstack_buckets(by_time, len(TIME_BUCKET_EDGES) + 1), time_weights)
+    user_avg = _grouped_weighted_mean(*_unstack_buckets(by_user, len(PROGRESS_BUCKET_EDGES) + 1), user_weights)
+
+    rating = time_avg * time_w / 100 + user_avg * user_w / 100
+    rating.index.name = aggregate.index.names[0]
+    return rating.sort_index()
+
+
+def grouped_course_weighted_rating(dataframe, course_col, current_date=None, time_weights=TIME_WEIGHTS,
+                                   user_weights=USER_WEIGHTS, time_w=50, user_w=50):
+    """
+
+    course_weighted_rating for many courses at once.
+
+    - Time and progress buckets are assigned once with np.digitize for the whole reviews table.
+    - Rating sums and counts are aggregated in a single groupby over (course, time bucket, progress bucket);
+      both weighted averages are then derived from that small aggregate.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        reviews with Rating, Progress and either days or Timestamp columns
+    course_col: str
+        name of the course id column
+    current_date: str, datetime or pd.Timestamp
+        when given, days are computed from Timestamp; otherwise the existing days column is used
+    time_weights: tuple of 4 numbers
+        weights of the time buckets, in percent
+    user_weights: tuple of 4 numbers
+        weights of the progress buckets, in percent
+    time_w: float
+        weight of the time based average, in percent
+    user_w: float
+        weight of the user based average, in percent
+
+    Returns
+    -------
+    weighted ratings: pd.Series indexed by course id
+
+    """
+    aggregate = course_bucket_aggregate(dataframe, course_col, current_date)
+    return course_weighted_rating_from_aggregate(aggregate, time_weights, user_weights, time_w, user_w)
+
+
+####################
+# Exponentially time-decayed rating
+####################
+
+def _decay_weights(timestamps, ratings, now, half_life):
+    # Weights from fractional days before now; a NaN rating gets weight 0.
+    weights = np.exp2((to_days(timestamps) - now) / half_life)
+    nan = np.isnan(ratings)
+    return np.where(nan, 0.0, weights), np.where(nan, 0.0, ratings)
+
+
+def time_decayed_average(dataframe, half_life=30, current_date=None):
+    """
+
+    Exponentially time-decayed mean of the Rating column, for a single course.
+
+    - A review made days ago has weight 0.5 ** (days / half_life), so its weight halves every half_life days.
+    - days is the fractional age of the review at current_date, from the Timestamp column,
+      the same quantity TimeDecayedRatings uses; the integer days column is not used.
+    - Unlike time_based_weighted_average, there are no bucket edges: the score moves smoothly as reviews age.
+    - Reviews with a NaN Rating are skipped.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        reviews of the course with Rating and Timestamp columns
+    half_life: float
+        days after which a review counts half as much as a new one
+    current_date: str, datetime or pd.Timestamp
+        reference date of the score (defaults to now)
+
+    Returns
+    -------
+    decayed rating: float
+
+    """
+    current_date = pd.Timestamp.now() if current_date is None else pd.Timestamp(current_date)
+    weights, ratings = _decay_weights(dataframe['Timestamp'], dataframe['Rating'].to_numpy(np.float64),
+                                      to_days(current_date), half_life)
+    return float(weights @ ratings / weights.sum())
+
+
+class TimeDecayedRatings:
+    """
+
+    Streaming exponentially time-decayed ratings of many courses.
+
+    - Every course keeps only a decayed rating sum, a decayed weight and the date they refer to,
+      in flat arrays, so add_review is O(1) and 50k courses take a few MB.
+    - The state of a course is rescaled lazily, only when a newer review of that course arrives or when it is read;
+      advance_to only moves the clock and never touches the course states.
+    - Advancing the clock scales the sum and the weight of a course by the same factor, so the decayed mean
+      does not change; the decayed weight (effective number of recent reviews) does, which is what
+      pulls a course towards prior_mean when prior_weight is used.
+
+    Parameters
+    ----------
+    half_life: float
+        days after which a review counts half as much as a new one
+    current_date: str, datetime or pd.Timestamp
+        reference date of the scores (defaults to now)
+    prior_mean: float
+        rating a course is shrunk towards when it has few recent reviews, e.g. the catalog mean
+    prior_weight: float
+        weight of prior_mean, in reviews; 0 gives the plain decayed mean
+
+    """
+
+    def __init__(self, half_life=30, current_date=None, prior_mean=0.0, prior_weight=0.0):
+        self.half_life = half_life
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.current_date = pd.Timestamp.now() if current_date is None else pd.Timestamp(current_date)
+        self._now = to_days(self.current_date)
+
+        self.courses = []
+        self._slots = {}
+        self._sums = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._updated = np.zeros(0)
+
+    @classmethod
+    def from_dataframe(cls, dataframe, course_col, half_life=30, current_date=None, **kwargs):
+        """
+        Builds the state of every course from a reviews frame with Rating and Timestamp columns, in one vectorized pass.
+        """
+        ratings = cls(half_life, current_date, **kwargs)
+        weights, values = _decay_weights(dataframe['Timestamp'], dataframe['Rating'].to_numpy(np.float64),
+                                         ratings._now, half_life)
+        sums = pd.DataFrame({'sum': weights * values, 'weight': weights}) \
+            .groupby(dataframe[course_col].to_numpy(), sort=False).sum()
+
+        ratings.courses = sums.index.tolist()
+        ratings._slots = {course: slot for slot, course in enumerate(ratings.courses)}
+        ratings._sums = sums['sum'].to_numpy(copy=True)
+        ratings._weights = sums['weight'].to_numpy(copy=True)
+        ratings._updated = np.full(len(sums), ratings._now)
+        return ratings
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __contains__(self, course):
+        return course in self._slots
+
+    def _slot(self, course):
+        slot = self._slots.get(course)
+        if slot is None:
+            slot = len(self.courses)
+            if slot == len(self._sums):
+                # Amortized O(1) growth of the state arrays.
+                capacity = max(16, 2 * slot)
+                self._sums = np.resize(self._sums, capacity)
+                self._weights = np.resize(self._weights, capacity)
+                self._updated = np.resize(self._updated, capacity)
+            self._sums[slot] = self._weights[slot] = 0.0
+            self._updated[slot] = self._now
+            self._slots[course] = slot
+            self.courses.append(course)
+        return slot
+
+    def add_review(self, course, rating, timestamp):
+        """
+        Adds a single review event of a course; reviews may arrive out of order. A NaN rating is ignored.
+        """
+        slot = self._slot(course)
+        rating = float(rating)
+        if math.isnan(rating):
+            return
+        day = to_days(timestamp)
+        age = self._updated[slot] - day
+        if age < 0:
+            # Newer than the state of the course: decay the state to this review instead.
+            scale = 2.0 ** (age / self.half_life)
+            self._sums[slot] *= scale
+            self._weights[slot] *= scale
+            self._updated[slot] = day
+            weight = 1.0
+        else:
+            weight = 2.0 ** (-age / self.half_life)
+        self._sums[slot] += weight * rating
+        self._weights[slot] += weight
+
+    def advance_to(self, current_date):
+        """
+        Moves the reference date forward in O(1); the course states are rescaled when they are read.
+        """
+        current_date = pd.Timestamp(current_date)
+        if current_date < self.current_date:
+            raise ValueError("current_date can only move forward: %s < %s" % (current_date, self.current_date))
+        self.current_date = current_date
+        self._now = to_days(current_date)
+
+    def _scale(self, slots):
+        return np.exp2((self._updated[slots] - self._now) / self.half_life)
+
+    def _score(self, sums, weights):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (sums + self.prior_weight * self.prior_mean) / (weights + self.prior_weight)
+
+    def effective_count(self, course):
+        """
+        Decayed weight of a course at the current date, i.e. how many brand new reviews it is worth.
+        """
+        slot = self._slots[course]
+        return float(self._weights[slot] * self._scale(slot))
+
+    def rating(self, course):
+        slot = self._slots[course]
+        scale = self._scale(slot)
+        return float(self._score(self._sums[slot] * scale, self._weights[slot] * scale))
+
+    def ratings(self):
+        """
+        Decayed rating of every course at the current date, vectorized over the state arrays.
+        """
+        n = len(self.courses)
+        scale = self._scale(slice(0, n))
+        return pd.Series(self._score(self._sums[:n] * scale, self._weights[:n] * scale),
+                         index=pd.Index(self.courses), name='time_decayed_rating')
@@ -0,0 +1,179 @@
+"""
+IMDB weighted rating.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from measurement_problems.sketch import QuantileSketch
+
+M = 2500
+
+
+def weighted_rating(r, v, M, C):
+    """
+
+    IMDB weighted rating
+
+    weighted_rating = (v/(v+M) * r) + (M/(v+M) * C)
+
+    Parameters
+    ----------
+    r: float or array-like
+        vote average
+    v: float or array-like
+        vote count
+    M: float
+        minimum votes required to be listed
+    C: float
+        the mean vote across the whole catalog
+
+    Returns
+    -------
+    weighted rating: float or array-like
+
+    """
+    return (v / (v + M) * r) + (M / (v + M) * C)
+
+
+def add_movie_scores(dataframe, M=M, C=None):
+    """
+    Adds the weighted_rating column to a movies frame with vote_average and vote_count, in place.
+    C defaults to the mean vote_average of the frame.
+    """
+    C = dataframe['vote_average'].mean() if C is None else C
+    dataframe['weighted_rating'] = weighted_rating(dataframe['vote_average'], dataframe['vote_count'], M, C)
+    return dataframe
+
+
+class WeightedRatingIndex:
+    """
+
+    Live catalog of IMDB weighted ratings, kept in descending score order.
+
+    - C is maintained from running totals of vote_average, so it is O(1) to update.
+    - M is either fixed or the m_quantile of vote_count, tracked with a streaming QuantileSketch.
+    - A changed title only rescores that title, against the C and M in use, and moves it in the sorted order.
+      The order is a sorted Python list: finding the position is O(log n), but insort and del shift the tail,
+      an O(n) memmove of pointers (about 0.2 ms per upsert at 1M titles).
+    - C and M are pinned for scoring; when the live values drift further than c_tolerance (absolute) or
+      m_tolerance (relative), every score depends on them, so the catalog is rescored once, vectorized.
+
+    Parameters
+    ----------
+    M: float
+        minimum votes required to be listed, used when m_quantile is None
+    m_quantile: float
+        vote_count quantile used as M, e.g. 0.90
+    c_tolerance: float
+        allowed absolute drift of C before a full rescore
+    m_tolerance: float
+        allowed relative drift of M before a full rescore
+    relative_accuracy: float
+        relative accuracy of the vote_count quantile sketch
+
+    """
+
+    def __init__(self, M=M, m_quantile=None, c_tolerance=0.01, m_tolerance=0.05, relative_accuracy=0.01):
+        self.fixed_M = M
+        self.m_quantile = m_quantile
+        self.c_tolerance = c_tolerance
+        self.m_tolerance = m_tolerance
+
+        self.vote_average = {}
+        self.vote_count = {}
+        self.scores = {}
+        self._order = []
+        self._sum_vote_average = 0.0
+        self._sketch = QuantileSketch(relative_accuracy)
+
+        self.C = math.nan
+        self.M = M
+
+    @classmethod
+    def from_dataframe(cls, dataframe, **kwargs):
+        """
+        Builds the index from a frame with vote_average and vote_count columns, keyed by the frame index.
+        Titles with a missing vote_average or vote_count are skipped.
+        """
+        index = cls(**kwargs)
+        valid = dataframe[['vote_average', 'vote_count']].dropna()
+        index.vote_average = dict(zip(valid.index, valid['vote_average'].astype(float)))
+        index.vote_count = dict(zip(valid.index, valid['vote_count'].astype(float)))
+        index._sum_vote_average = float(valid['vote_average'].sum())
+        index._sketch.add_many(valid['vote_count'])
+        index.rescore()
+        return index
+
+    def __len__(self):
+        return len(self.vote_average)
+
+    @property
+    def live_C(self):
+        return self._sum_vote_average / len(self) if len(self) else math.nan
+
+    @property
+    def live_M(self):
+        return self.fixed_M if self.m_quantile is None else self._sketch.quantile(self.m_quantile)
+
+    def rescore(self):
+        """
+        Pins the live C and M and rescores the whole catalog in one vectorized pass.
+        """
+        self.C, self.M = self.live_C, self.live_M
+        ids = list(self.vote_average)
+        r = np.fromiter(self.vote_average.values(), dtype=np.float64, count=len(ids))
+        v = np.fromiter(self.vote_count.values(), dtype=np.float64, count=len(ids))
+        scores = weighted_rating(r, v, self.M, self.C)
+        self.scores = dict(zip(ids, scores.tolist()))
+        self._order = sorted(zip((-scores).tolist(), ids))
+
+    def _drifted(self):
+        if math.isnan(self.C):
+            return True
+        c_drift = abs(self.live_C - self.C) > self.c_tolerance
+        if self.M == 0:
+            # No relative drift from a pinned M of 0, e.g. after the first votes of an empty index: any M > 0 drifted.
+            m_drift = self.live_M > 0
+        else:
+            m_drift = abs(self.live_M - self.M) / self.M > self.m_tolerance
+        return c_drift or m_drift
+
+    def _unlink(self, title_id):
+        key = (-self.scores.pop(title_id), title_id)
+        i = bisect_left(self._order, key)
+        del self._order[i]
+        self._sum_vote_average -= self.vote_average.pop(title_id)
+        self._sketch.remove(self.vote_count.pop(title_id))
+
+    def upsert(self, title_id, vote_average, vote_count):
+        """
+        Adds a title or replaces its votes; returns its weighted rating.
+        """
+        if title_id in self.scores:
+            self._unlink(title_id)
+        self.vote_average[title_id] = float(vote_average)
+        self.vote_count[title_id] = float(vote_count)
+        self._sum_vote_average += float(vote_average)
+        self._sketch.add(float(vote_count))
+
+        if self._drifted():
+            self.rescore()
+        else:
+            score = weighted_rating(float(vote_average), float(vote_count), self.M, self.C)
+            self.scores[title_id] = score
+            insort(self._order, (-score, title_id))
+        return self.scores[title_id]
+
+    def remove(self, title_id):
+        self._unlink(title_id)
+        if len(self) and self._drifted():
+            self.rescore()
+
+    def top(self, k=10):
+        """
+        [(title_id, weighted_rating), ...] of the k best titles, read from the head of the sorted order.
+        """
+        return [(title_id, -neg_score) for neg_score, title_id in self._order[:k]]
@@ -0,0 +1,168 @@
+"""
+Chunked CSV ingestion with compact dtypes for the review and rating datasets.
+"""
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.bar import bayesian_average_rating_matrix
+from measurement_problems.course_rating import (TIME_WEIGHTS, USER_WEIGHTS, course_bucket_aggregate,
+                                                course_weighted_rating_from_aggregate)
+from measurement_problems.sorting import PRODUCT_STAR_COLUMNS
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+IMDB_STAR_COLUMNS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+# dtype: applied by the parser while reading
+# parse_dates: parsed to datetime64 at read time
+# usecols: only these columns are read (None reads every column)
+# coerce: numeric columns that may contain malformed values; they are parsed with pd.to_numeric(errors='coerce')
+DATASETS = {
+    "course_reviews": {
+        "dtype": {"Rating": "float32",
+                  "Progress": "float32",
+                  "Questions Asked": "float32",
+                  "Questions Answered": "float32",
+                  "course_name": "category",
+                  "instructor_name": "category"},
+        "parse_dates": ["Timestamp", "Enrolled"],
+    },
+    "product_sorting": {
+        "dtype": {"course_name": "category",
+                  "instructor_name": "category",
+                  "purchase_count": "uint32",
+                  "rating": "float32",
+                  "commment_count": "uint32",
+                  **{column: "uint32" for column in PRODUCT_STAR_COLUMNS}},
+    },
+    "movies_metadata": {
+        "dtype": {"title": "string"},
+        "usecols": ["title", "vote_average", "vote_count"],
+        "coerce": {"vote_average": "float32", "vote_count": "float32"},
+    },
+    "imdb_ratings": {
+        "dtype": {column: "uint32" for column in IMDB_STAR_COLUMNS},
+    },
+}
+
+
+def _read_csv_kwargs(dataset):
+    try:
+        spec = DATASETS[dataset]
+    except KeyError:
+        raise ValueError("Unknown dataset %r, expected one of %s" % (dataset, sorted(DATASETS))) from None
+
+    kwargs = {"usecols": spec.get("usecols"),
+              "dtype": spec.get("dtype", {}),
+              "parse_dates": spec.get("parse_dates", [])}
+    return kwargs, spec.get("coerce", {})
+
+
+def _coerce(chunk, coerce):
+    for column, kind in coerce.items():
+        if column in chunk:
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype(kind)
+    return chunk
+
+
+def _present(path, kwargs):
+    # Columns that are declared but absent from a given export are skipped; read_csv rejects unknown parse_dates.
+    header = pd.read_csv(path, nrows=0).columns
+    if kwargs["usecols"] is not None:
+        header = header.intersection(kwargs["usecols"])
+    kwargs = dict(kwargs)
+    kwargs["dtype"] = {column: kind for column, kind in kwargs["dtype"].items() if column in header}
+    kwargs["parse_dates"] = [column for column in kwargs["parse_dates"] if column in header]
+    return kwargs
+
+
+def iter_chunks(path, dataset, chunksize=DEFAULT_CHUNKSIZE):
+    """
+
+    Reads one of the known datasets in chunks with compact dtypes.
+
+    - Ratings are float32, counts uint32, instructor and course names categorical,
+      timestamps are parsed at read time.
+    - Peak memory is bounded by chunksize and not by the file size.
+
+    Parameters
+    ----------
+    path: str
+        csv file path
+    dataset: str
+        one of DATASETS keys: course_reviews, product_sorting, movies_metadata, imdb_ratings
+    chunksize: int
+        number of rows per chunk
+
+    Returns
+    -------
+    chunks: iterator of pd.DataFrame
+
+    """
+    kwargs, coerce = _read_csv_kwargs(dataset)
+    kwargs = _present(path, kwargs)
+    with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield _coerce(chunk, coerce)
+
+
+def read_dataset(path, dataset):
+    """
+    Reads a whole dataset at once with the same compact dtypes as iter_chunks.
+    """
+    kwargs, coerce = _read_csv_kwargs(dataset)
+    return _coerce(pd.read_csv(path, **_present(path, kwargs)), coerce)
+
+
+def chunked_course_weighted_rating(path, course_col, current_date, chunksize=DEFAULT_CHUNKSIZE,
+                                   time_weights=TIME_WEIGHTS, user_weights=USER_WEIGHTS, time_w=50, user_w=50):
+    """
+
+    Weighted rating per course for a reviews file that does not fit in memory.
+
+    - Every chunk is reduced to rating sums and counts per (course, time bucket, progress bucket),
+      the partial aggregates are merged and the weighted ratings are computed once at the end.
+
+    Returns
+    -------
+    weighted ratings: pd.Series indexed by course id
+
+    """
+    aggregate = None
+    for chunk in iter_chunks(path, "course_reviews", chunksize):
+        partial = course_bucket_aggregate(chunk, course_col, current_date)
+        aggregate = partial if aggregate is None else _merge_aggregates(aggregate, partial)
+    return course_weighted_rating_from_aggregate(aggregate, time_weights, user_weights, time_w, user_w)
+
+
+def _merge_aggregates(left, right):
+    return pd.concat([left, right]).groupby(level=[0, 1, 2], observed=True).sum()
+
+
+def chunked_bar_scores(path, dataset, chunksize=DEFAULT_CHUNKSIZE, confidence=0.95):
+    """
+
+    Bayesian Average Rating Score of every row of product_sorting or imdb_ratings, computed chunk by chunk.
+
+    Returns
+    -------
+    bar scores: np.ndarray of float32, in file order
+
+    """
+    star_columns = {"product_sorting": PRODUCT_STAR_COLUMNS, "imdb_ratings": IMDB_STAR_COLUMNS}[dataset]
+    scores = [bayesian_average_rating_matrix(chunk[star_columns], confidence).astype(np.float32)
+              for chunk in iter_chunks(path, dataset, chunksize)]
+    return np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+
+
+def chunked_column_bounds(path, dataset, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Min and max of numeric columns over the whole file, e.g. to fit MinMax scaling without loading it.
+    """
+    mins, maxs = [], []
+    for chunk in iter_chunks(path, dataset, chunksize):
+        mins.append(chunk[columns].min())
+        maxs.append(chunk[columns].max())
+    return pd.DataFrame({"min": pd.concat(mins, axis=1).min(axis=1),
+                         "max": pd.concat(maxs, axis=1).max(axis=1)})
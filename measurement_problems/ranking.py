@@ -0,0 +1,315 @@
+"""
+Declarative ranking pipelines: weighted blends of scorers compiled into a single columnar pass.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from measurement_problems._stats import z_quantile
+from measurement_problems._util import row_mask
+from measurement_problems.imdb import M
+from measurement_problems.scaling import min_max_scale
+from measurement_problems.sorting import PRODUCT_STAR_COLUMNS
+from measurement_problems.topk import top_k_positions
+
+Stage = namedtuple("Stage", ["scorer", "weight", "normalization"], defaults=(100, None))
+
+DEFAULT_PARAMS = {
+    "star_columns": PRODUCT_STAR_COLUMNS,
+    "confidence": 0.95,
+    "up_col": "up",
+    "down_col": "down",
+    "vote_average_col": "vote_average",
+    "vote_count_col": "vote_count",
+    "M": M,
+    "C": None,
+    "feature_range": (1, 5),
+}
+
+
+####################
+# Shared intermediates
+####################
+
+def _star_moments(context):
+    # N, sum(stars * counts) and sum(stars ** 2 * counts) of every row, accumulated column by column,
+    # so no (N x K) matrix is materialized.
+    n = star_sum = star_square_sum = 0.0
+    for star, column in enumerate(context.params["star_columns"], start=1):
+        counts = context.column(column)
+        n = n + counts
+        star_sum = star_sum + star * counts
+        star_square_sum = star_square_sum + star * star * counts
+    return n, star_sum, star_square_sum
+
+
+def _votes(context):
+    return context.column(context.params["up_col"]) + context.column(context.params["down_col"])
+
+
+def _catalog_mean(context):
+    C = context.params["C"]
+    return np.nanmean(context.column(context.params["vote_average_col"])) if C is None else C
+
+
+INTERMEDIATES = {
+    "star_moments": _star_moments,
+    "star_n": lambda context: context.get("star_moments")[0],
+    "star_sum": lambda context: context.get("star_moments")[1],
+    "star_square_sum": lambda context: context.get("star_moments")[2],
+    "votes": _votes,
+    "C": _catalog_mean,
+    "z": lambda context: z_quantile(context.params["confidence"]),
+}
+
+
+class ScoringContext:
+    """
+
+    Columns and intermediates of one frame, computed at most once per pipeline run.
+
+    - Columns are read once as float64 arrays (no copy when they already are float64).
+    - Intermediates such as N, the star sums, vote totals and the z value
+      are computed on first use and shared by every scorer that needs them.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame or dict of array-like
+        rows to score
+    params: dict
+        overrides of DEFAULT_PARAMS
+
+    """
+
+    def __init__(self, dataframe, **params):
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise TypeError("Unknown scoring parameters: %s" % sorted(unknown))
+        self.dataframe = dataframe
+        self.params = {**DEFAULT_PARAMS, **params}
+        self._columns = {}
+        self._intermediates = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.asarray(self.dataframe[name], dtype=np.float64)
+        return self._columns[name]
+
+    def get(self, name):
+        if name not in self._intermediates:
+            self._intermediates[name] = INTERMEDIATES[name](self)
+        return self._intermediates[name]
+
+
+####################
+# Scorers
+####################
+
+def _ratio(numerator, denominator):
+    # Rows without observations are scored as 0, as the scalar scorers do.
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def bar_scorer(context):
+    """
+    Bayesian Average Rating from the shared star sums; same result as bayesian_average_rating_matrix.
+    """
+    K = len(context.params["star_columns"])
+    N = context.get("star_n")
+    total = N + K
+    z = context.get("z")
+
+    # Smoothing adds one observation to every star value: sum(stars) and sum(stars ** 2) more.
+    first_part = (context.get("star_sum") + K * (K + 1) / 2) / total
+    second_part = (context.get("star_square_sum") + K * (K + 1) * (2 * K + 1) / 6) / total
+    variance = np.maximum(second_part - first_part * first_part, 0.0)
+    scores = first_part - z * np.sqrt(variance / (total + 1))
+    scores[N == 0] = 0.0
+    return scores
+
+
+def star_average_scorer(context):
+    return _ratio(context.get("star_sum"), context.get("star_n"))
+
+
+def wilson_lower_bound_scorer(context):
+    """
+    Wilson lower bound from the shared vote totals; same result as wilson_lower_bound_batch.
+    """
+    n = context.get("votes")
+    z = context.get("z")
+    z2 = z * z
+    phat = _ratio(context.column(context.params["up_col"]), n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (phat + z2 / (2 * n) - z * np.sqrt((phat * (1 - phat) + z2 / (4 * n)) / n)) / (1 + z2 / n)
+    scores[n == 0] = 0.0
+    return scores
+
+
+def average_rating_scorer(context):
+    return _ratio(context.column(context.params["up_col"]), context.get("votes"))
+
+
+def up_down_diff_scorer(context):
+    return context.column(context.params["up_col"]) - context.column(context.params["down_col"])
+
+
+def imdb_weighted_rating_scorer(context):
+    r = context.column(context.params["vote_average_col"])
+    v = context.column(context.params["vote_count_col"])
+    M, C = context.params["M"], context.get("C")
+    return (v / (v + M) * r) + (M / (v + M) * C)
+
+
+SCORERS = {
+    "bar": bar_scorer,
+    "star_average": star_average_scorer,
+    "wlb": wilson_lower_bound_scorer,
+    "average_rating": average_rating_scorer,
+    "up_down_diff": up_down_diff_scorer,
+    "imdb_weighted_rating": imdb_weighted_rating_scorer,
+}
+
+
+@lru_cache(maxsize=None)
+def column(name):
+    """
+    Scorer that reads a raw column, e.g. Stage(column("purchase_count"), 26, "minmax").
+    The same scorer object is returned for the same name, so repeated stages are merged when compiled.
+    """
+    def column_scorer(context):
+        return context.column(name)
+
+    column_scorer.__name__ = "column(%r)" % name
+    return column_scorer
+
+
+####################
+# Normalizations
+####################
+
+def _minmax(values, context):
+    # Same as MinMaxScaler(feature_range).fit_transform; NaN rows are ignored by the bounds.
+    return min_max_scale(values, context.params["feature_range"], np.nanmin(values), np.nanmax(values))
+
+
+def _zscore(values, context):
+    std = np.nanstd(values)
+    return (values - np.nanmean(values)) / std if std else np.zeros_like(values)
+
+
+def _rank(values, context):
+    # Percentile rank in (0, 1]; ties share the highest rank of the tie, NaN stays NaN.
+    valid = ~np.isnan(values)
+    order = np.sort(values[valid])
+    ranks = np.full(values.shape, np.nan)
+    ranks[valid] = np.searchsorted(order, values[valid], side="right") / len(order)
+    return ranks
+
+
+NORMALIZATIONS = {
+    None: lambda values, context: values,
+    "minmax": _minmax,
+    "zscore": _zscore,
+    "rank": _rank,
+}
+
+
+####################
+# Pipeline
+####################
+
+class RankingPipeline:
+    """
+
+    Weighted blend of scorers, compiled into a single columnar pass.
+
+    - Every stage is (scorer, weight, normalization):
+      scorer is a name of SCORERS, a column(...) scorer, any callable taking a ScoringContext, or another pipeline;
+      weight is in percent, as in the w / 100 blends of the scripts;
+      normalization is None or one of "minmax", "zscore", "rank".
+    - Nested pipelines without a normalization are flattened, so hybrid = BAR 60 + WSS 40 becomes
+      one weighted sum of BAR and the three scaled WSS inputs; stages reading the same scorer are merged.
+    - Scorers share the intermediates of one ScoringContext (N, star sums, vote totals, z),
+      and scores are accumulated into a single array without intermediate DataFrame columns.
+
+    Parameters
+    ----------
+    stages: list of Stage or (scorer, weight, normalization) tuples
+
+    Examples
+    --------
+    pipeline = RankingPipeline([("bar", 60), (WEIGHTED_SORTING_SCORE, 40)])
+    pipeline.rank(df, k=20)
+
+    """
+
+    def __init__(self, stages):
+        self.stages = [Stage(*stage) for stage in stages]
+        for stage in self.stages:
+            if stage.normalization not in NORMALIZATIONS:
+                raise ValueError("normalization must be one of %s, got %r" % (list(NORMALIZATIONS),
+                                                                              stage.normalization))
+        self.plan = self._compile()
+
+    def _resolve(self, scorer):
+        if isinstance(scorer, str):
+            if scorer not in SCORERS:
+                raise ValueError("Unknown scorer %r; use one of %s or column(name)" % (scorer, sorted(SCORERS)))
+            return SCORERS[scorer]
+        if isinstance(scorer, RankingPipeline):
+            return scorer.evaluate
+        return scorer
+
+    def _leaves(self, scale):
+        for scorer, weight, normalization in self.stages:
+            if isinstance(scorer, RankingPipeline) and normalization is None:
+                yield from scorer._leaves(scale * weight / 100)
+            else:
+                yield self._resolve(scorer), scale * weight / 100, normalization
+
+    def _compile(self):
+        # [(scorer, weight as a fraction, normalization), ...] with equal (scorer, normalization) pairs merged.
+        weights = {}
+        for scorer, weight, normalization in self._leaves(1.0):
+            weights[(scorer, normalization)] = weights.get((scorer, normalization), 0.0) + weight
+        return [(scorer, weight, normalization) for (scorer, normalization), weight in weights.items()]
+
+    def evaluate(self, context):
+        scores = None
+        for scorer, weight, normalization in self.plan:
+            values = NORMALIZATIONS[normalization](scorer(context), context)
+            if scores is None:
+                scores = values * weight
+            else:
+                scores += values * weight
+        return scores
+
+    def score(self, dataframe, **params):
+        """
+        Blended scores of every row, as a float64 array aligned with the rows of dataframe.
+        """
+        return self.evaluate(ScoringContext(dataframe, **params))
+
+    def rank(self, dataframe, k=20, score_col="score", where=None, **params):
+        """
+        The k best rows with their blended score in score_col; where filters the rows as in top_k.
+        """
+        scores = self.score(dataframe, **params)
+        mask = row_mask(dataframe, where)
+        positions = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+        positions = positions[top_k_positions(scores[positions], k)]
+        top = dataframe.iloc[positions].copy()
+        top[score_col] = scores[positions]
+        return top
+
+
+# Ranking blends of the scripts.
+WEIGHTED_SORTING_SCORE = RankingPipeline([(column("commment_count"), 32, "minmax"),
+                                          (column("purchase_count"), 26, "minmax"),
+                                          (column("rating"), 42)])
+HYBRID_SORTING_SCORE = RankingPipeline([("bar", 60), (WEIGHTED_SORTING_SCORE, 40)])
+REVIEW_SCORE = RankingPipeline([("wlb", 100)])
+MOVIE_SCORE = RankingPipeline([("imdb_weighted_rating", 100)])
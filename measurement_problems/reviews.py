@@ -0,0 +1,85 @@
+"""
+Review sorting scores: up-down difference, average rating and Wilson lower bound.
+"""
+
+import numpy as np
+
+from measurement_problems._stats import z_quantile
+
+
+def score_up_down_diff(up, down):
+    return up - down
+
+
+def score_average_rating(up, down):
+    if up + down == 0:
+        return 0
+    return up / (up + down)
+
+
+def wilson_lower_bound_batch(up, down, confidence=0.95):
+    """
+
+    Vectorized Wilson Lower Bound Score calculation
+
+    - Scores every (up, down) pair in a single NumPy pass.
+    - The z value is computed once per confidence level instead of once per review.
+    - Pairs with no votes (n == 0) are masked and scored as 0.
+
+    Parameters
+    ----------
+    up: array-like (np.ndarray, pd.Series, list)
+        up counts
+    down: array-like (np.ndarray, pd.Series, list)
+        down counts
+    confidence: float
+        confidence
+
+    Returns
+    -------
+    wilson scores: np.ndarray of float64
+
+    """
+    up, down = np.broadcast_arrays(np.asarray(up, dtype=np.float64), np.asarray(down, dtype=np.float64))
+    n = up + down
+    z = z_quantile(confidence)
+    z2 = z * z
+
+    scores = np.zeros(n.shape, dtype=np.float64)
+    mask = n > 0
+    if not mask.any():
+        return scores
+
+    n = n[mask]
+    phat = up[mask] / n
+    scores[mask] = (phat + z2 / (2 * n) - z * np.sqrt((phat * (1 - phat) + z2 / (4 * n)) / n)) / (1 + z2 / n)
+    return scores
+
+
+def wilson_lower_bound(up, down, confidence=0.95):
+    """
+
+    Wilson Lower Bound Score calculation
+
+    - The lower limit of the confidence interval to be calculated for the Bernoulli parameter p is accepted as the WLB score.
+    - The calculated score is used for product ranking.
+    - Thin scalar wrapper over wilson_lower_bound_batch.
+    - Note:
+    If the scores are between 1-5, 1-3 are marked as negative, 4-5 as positive and can be made to conform to Bernoulli.
+    This causes some problems. For this reason, it is necessary to make a bayesian average rating.
+
+    Parameters
+    ----------
+    up: int
+        up count
+    down: int
+        down count
+    confidence: float
+        confidence
+
+    Returns
+    -------
+    wilson score: float
+
+    """
+    return float(wilson_lower_bound_batch(up, down, confidence))
@@ -0,0 +1,110 @@
+"""
+MinMax scaling state that can be updated row by row.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+
+def min_max_scale(values, feature_range=(1, 5), data_min=None, data_max=None):
+    """
+
+    Same transformation as MinMaxScaler(feature_range).fit(values).transform(values) for a single column.
+
+    - data_min and data_max can be given to scale with known bounds instead of the bounds of values.
+    - A constant column is mapped to the lower end of the range, as MinMaxScaler does.
+
+    Returns
+    -------
+    scaled values: np.ndarray of float64
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    data_min = values.min() if data_min is None else data_min
+    data_max = values.max() if data_max is None else data_max
+    data_range = data_max - data_min
+    low, high = feature_range
+    scale = (high - low) / data_range if data_range else 0.0
+    return (values - data_min) * scale + low
+
+
+class MinMaxState:
+    """
+
+    Running min and max of a column, kept up to date as single values change.
+
+    - Value frequencies are kept in a hash map, so add, remove and replace are O(1).
+    - Bounds only need to be searched again when the last occurrence of the min or max leaves the column,
+      which costs O(distinct values) and is rare.
+    - transform gives the same result as MinMaxScaler(feature_range).fit(column).transform(column).
+
+    Parameters
+    ----------
+    feature_range: tuple (min, max)
+        desired range of the transformed data
+
+    """
+
+    def __init__(self, feature_range=(1, 5)):
+        self.feature_range = feature_range
+        self.counts = Counter()
+        self.data_min = None
+        self.data_max = None
+
+    def fit(self, values):
+        self.counts = Counter(np.asarray(values).tolist())
+        self._refresh()
+        return self
+
+    def _refresh(self):
+        self.data_min = min(self.counts) if self.counts else None
+        self.data_max = max(self.counts) if self.counts else None
+
+    @property
+    def bounds(self):
+        return self.data_min, self.data_max
+
+    def add(self, value):
+        """
+        Adds a value; returns True when the bounds moved.
+        """
+        self.counts[value] += 1
+        if self.data_min is None:
+            self.data_min = self.data_max = value
+            return True
+        if value < self.data_min:
+            self.data_min = value
+            return True
+        if value > self.data_max:
+            self.data_max = value
+            return True
+        return False
+
+    def remove(self, value):
+        """
+        Removes a value; returns True when the bounds moved.
+        """
+        self.counts[value] -= 1
+        if self.counts[value] > 0:
+            return False
+        del self.counts[value]
+        if value == self.data_min or value == self.data_max:
+            bounds = self.bounds
+            self._refresh()
+            return self.bounds != bounds
+        return False
+
+    def replace(self, old_value, new_value):
+        """
+        Replaces one occurrence of old_value with new_value; returns True when the bounds moved.
+        """
+        if old_value == new_value:
+            return False
+        bounds = self.bounds
+        self.add(new_value)
+        self.remove(old_value)
+        return self.bounds != bounds
+
+    def transform(self, values):
+        return min_max_scale(values, self.feature_range, self.data_min, self.data_max)
@@ -0,0 +1,247 @@
+"""
+Inverted index over course and instructor names with score-ordered posting lists.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+
+_TOKEN = re.compile(r"\w+")
+
+FIELDS = ("course_name", "instructor_name")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.casefold())
+
+
+def ngrams(text, n=3):
+    text = text.casefold()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class _Postings:
+    """
+    Row ids of one term, kept both as a list ordered by descending score and as a set for membership tests.
+    """
+
+    __slots__ = ("entries", "rows")
+
+    def __init__(self):
+        self.entries = []
+        self.rows = set()
+
+    @classmethod
+    def from_keys(cls, keys):
+        postings = cls()
+        postings.entries = sorted(keys)
+        postings.rows = {key[1] for key in keys}
+        return postings
+
+    def add(self, key):
+        insort(self.entries, key)
+        self.rows.add(key[1])
+
+    def discard(self, key):
+        i = bisect_left(self.entries, key)
+        if i < len(self.entries) and self.entries[i] == key:
+            del self.entries[i]
+            self.rows.discard(key[1])
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CourseSearchIndex:
+    """
+
+    Token and substring index over course_name and instructor_name.
+
+    - Every term (whole word) and every character n-gram maps to a posting list of row ids.
+    - Posting lists are ordered by descending score (e.g. hybrid_sorting_score), so a filtered top-K query
+      walks the head of the shortest list and stops after K matches instead of scanning and sorting every row.
+    - Adding a product, changing its score or removing it only touches the posting lists of that row.
+
+    Parameters
+    ----------
+    fields: tuple of str
+        indexed text fields
+    n: int
+        n-gram length of the substring index
+
+    """
+
+    def __init__(self, fields=FIELDS, n=3):
+        self.fields = tuple(fields)
+        self.n = n
+        self._texts = {}
+        self._scores = {}
+        self._terms = {field: {} for field in self.fields}
+        self._grams = {field: {} for field in self.fields}
+        self._all = _Postings()
+
+    @classmethod
+    def from_dataframe(cls, dataframe, score_col="hybrid_sorting_score", fields=FIELDS, n=3):
+        """
+        Builds the index of every row at once: keys are collected per term and each posting list is sorted once.
+
+        - A row id that occurs more than once keeps its last row, as repeated add calls would.
+        """
+        index = cls(fields, n)
+        dataframe = dataframe[~dataframe.index.duplicated(keep="last")]
+        texts = zip(*(dataframe[field].astype(str) for field in index.fields))
+        keys = []
+        for row_id, score, values in zip(dataframe.index, dataframe[score_col], texts):
+            index._texts[row_id] = dict(zip(index.fields, values))
+            index._scores[row_id] = float(score)
+            key = index._key(row_id)
+            keys.append(key)
+            for table, term in index._postings(row_id):
+                table.setdefault(term, []).append(key)
+
+        index._all = _Postings.from_keys(keys)
+        for tables in (index._terms, index._grams):
+            for table in tables.values():
+                for term, term_keys in table.items():
+                    table[term] = _Postings.from_keys(term_keys)
+        return index
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, row_id):
+        return row_id in self._scores
+
+    def _key(self, row_id):
+        return -self._scores[row_id], row_id
+
+    def _postings(self, row_id):
+        texts = self._texts[row_id]
+        for field in self.fields:
+            for term in set(tokenize(texts[field])):
+                yield self._terms[field], term
+            for gram in ngrams(texts[field], self.n):
+                yield self._grams[field], gram
+
+    def add(self, row_id, texts, score):
+        """
+        Adds a row, or replaces it when row_id is already indexed.
+
+        texts: dict of field -> text, score: ranking score of the row
+        """
+        if row_id in self._scores:
+            self.remove(row_id)
+        self._texts[row_id] = {field: str(texts[field]) for field in self.fields}
+        self._scores[row_id] = float(score)
+
+        key = self._key(row_id)
+        self._all.add(key)
+        for table, term in self._postings(row_id):
+            table.setdefault(term, _Postings()).add(key)
+
+    def update_score(self, row_id, score):
+        """
+        Moves a row to its new position in every posting list it belongs to.
+        """
+        old_key = self._key(row_id)
+        self._scores[row_id] = float(score)
+        new_key = self._key(row_id)
+
+        self._all.discard(old_key)
+        self._all.add(new_key)
+        for table, term in self._postings(row_id):
+            postings = table[term]
+            postings.discard(old_key)
+            postings.add(new_key)
+
+    def remove(self, row_id):
+        key = self._key(row_id)
+        self._all.discard(key)
+        for table, term in self._postings(row_id):
+            postings = table[term]
+            postings.discard(key)
+            if not postings:
+                del table[term]
+        del self._texts[row_id]
+        del self._scores[row_id]
+
+    @staticmethod
+    def _walk(postings, accept):
+        # postings: lists of the query terms; walk the shortest one in score order.
+        if any(p is None for p in postings):
+            return
+        postings = sorted(postings, key=len)
+        head, others = postings[0], postings[1:]
+        for key in head.entries:
+            row_id = key[1]
+            if all(row_id in other.rows for other in others) and accept(row_id):
+                yield key
+
+    def _field_tokens(self, field, terms):
+        return self._walk([self._terms[field].get(term) for term in terms], lambda row_id: True)
+
+    def _field_contains(self, field, substring, case):
+        needle = substring if case else substring.casefold()
+
+        def accept(row_id):
+            text = self._texts[row_id][field]
+            return needle in (text if case else text.casefold())
+
+        grams = ngrams(substring, self.n)
+        if not grams:
+            # Shorter than an n-gram: verify rows in score order.
+            return self._walk([self._all], accept)
+        return self._walk([self._grams[field].get(gram) for gram in grams], accept)
+
+    def _top(self, streams, k):
+        # Each stream is ordered by (-score, row_id); merge them lazily and stop after k distinct rows.
+        seen = set()
+        top = []
+        for _, row_id in heapq.merge(*streams):
+            if row_id not in seen:
+                seen.add(row_id)
+                top.append(row_id)
+                if len(top) == k:
+                    break
+        return top
+
+    def search(self, query, k=20, field=None):
+        """
+
+        Top-K rows whose field contains every word of the query (case-insensitive, whole words).
+
+        Parameters
+        ----------
+        query: str
+            words to match, e.g. "Veri Bilimi"
+        k: int
+            number of row ids to return
+        field: str
+            one of the indexed fields; None matches any of them
+
+        Returns
+        -------
+        row ids: list, ordered by descending score
+
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return [key[1] for key in islice(self._all.entries, k)]
+        fields = self.fields if field is None else (field,)
+        return self._top([self._field_tokens(f, terms) for f in fields], k)
+
+    def contains(self, substring, k=20, field="course_name", case=True):
+        """
+
+        Top-K rows with dataframe[field].str.contains(substring, regex=False) semantics.
+
+        - Candidate rows come from the n-gram posting lists and are verified against the stored text.
+
+        Returns
+        -------
+        row ids: list, ordered by descending score
+
+        """
+        fields = self.fields if field is None else (field,)
+        return self._top([self._field_contains(f, substring, case) for f in fields], k)
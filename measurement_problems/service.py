@@ -0,0 +1,395 @@
+"""
+Online scoring service over HTTP, with concurrent requests coalesced into vectorized micro-batches.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from measurement_problems.bar import bayesian_average_rating_matrix
+from measurement_problems.imdb import M, weighted_rating
+from measurement_problems.reviews import wilson_lower_bound_batch
+
+# Fields of one item of every kind, in the column order of the batch matrix.
+# products items carry a list of star counts instead, from 1 star to K stars.
+ITEM_FIELDS = {
+    "reviews": ("up", "down"),
+    "movies": ("vote_average", "vote_count"),
+}
+KINDS = ("reviews", "products", "movies")
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+
+class ServiceStats:
+    """
+    Request latencies (a window of the most recent ones), item, request and batch counters of a service.
+    """
+
+    def __init__(self, window=100_000):
+        self.latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.latencies.clear()
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.batch_items = 0
+        self.started = time.perf_counter()
+
+    def record_request(self, latency, n_items):
+        self.latencies.append(latency)
+        self.requests += 1
+        self.items += n_items
+
+    def record_batch(self, n_items):
+        self.batches += 1
+        self.batch_items += n_items
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies, dtype=np.float64, count=len(self.latencies)) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (np.nan, np.nan)
+        return {"requests": self.requests, "items": self.items, "batches": self.batches,
+                "mean_batch_size": self.batch_items / self.batches if self.batches else 0.0,
+                "p50_ms": float(p50), "p99_ms": float(p99),
+                "requests_per_s": self.requests / elapsed, "items_per_s": self.items / elapsed}
+
+
+class MicroBatcher:
+    """
+
+    Coalesces concurrent submissions into one call of a vectorized scorer.
+
+    - A batch is flushed as soon as it holds max_batch_size rows, or max_delay seconds after its first row,
+      whichever comes first; max_batch_size=1 scores every submission on its own.
+    - The scorer receives one (rows x columns) float64 matrix per batch and returns one score per row.
+
+    Parameters
+    ----------
+    score_batch: callable
+        np.ndarray of shape (N, K) -> np.ndarray of shape (N,)
+    max_batch_size: int
+        rows per batch that trigger an immediate flush
+    max_delay: float
+        longest time, in seconds, a row waits for its batch to fill up
+    stats: ServiceStats
+        optional counters of the flushed batches
+
+    """
+
+    def __init__(self, score_batch, max_batch_size=512, max_delay=0.002, stats=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.stats = stats
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+
+    async def submit(self, rows):
+        """
+        Scores a list of rows (tuples of numbers of equal length) within the next batch; returns their scores.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        if not pending:
+            return
+
+        rows = [row for request_rows, _ in pending for row in request_rows]
+        try:
+            scores = np.asarray(self.score_batch(np.array(rows, dtype=np.float64)), dtype=np.float64).tolist()
+        except Exception as error:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        if self.stats is not None:
+            self.stats.record_batch(len(rows))
+
+        start = 0
+        for request_rows, future in pending:
+            if not future.done():
+                future.set_result(scores[start:start + len(request_rows)])
+            start += len(request_rows)
+
+
+class ScoringService:
+    """
+
+    asyncio HTTP/1.1 scoring service for reviews (Wilson lower bound), products (BAR) and movies (IMDB weighted rating).
+
+    - POST /score/reviews   {"items": [{"up": 600, "down": 400}, ...]}
+    - POST /score/products  {"items": [{"stars": [1, 3, 10, 40, 120]}, ...]}
+    - POST /score/movies    {"items": [{"vote_average": 7.9, "vote_count": 12000}, ...]}
+      each answered with {"scores": [...]} in item order.
+    - GET /stats            p50/p99 latency, throughput and batch counters; POST /stats/reset clears them.
+    - Items of concurrent requests are coalesced by a MicroBatcher per kind (and per number of star values),
+      so every vectorized scorer runs once per batch instead of once per item.
+    - Connections are kept alive between requests unless the client sends Connection: close.
+
+    Parameters
+    ----------
+    max_batch_size: int
+        rows per batch that trigger an immediate flush
+    max_delay: float
+        longest time, in seconds, a row waits for its batch to fill up
+    confidence: float
+        confidence of the Wilson lower bound and of the BAR score
+    movie_M: float
+        minimum votes required to be listed, for the IMDB weighted rating
+    movie_C: float
+        mean vote across the catalog, for the IMDB weighted rating; movies requests are rejected without it
+
+    """
+
+    def __init__(self, max_batch_size=512, max_delay=0.002, confidence=0.95, movie_M=M, movie_C=None):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.confidence = confidence
+        self.movie_M = movie_M
+        self.movie_C = movie_C
+        self.stats = ServiceStats()
+        self._batchers = {}
+        self._server = None
+        # Open connections: writer -> handler task while a request is being answered, None while idle.
+        self._connections = {}
+        self._closing = False
+
+    def _scorer(self, kind):
+        if kind == "reviews":
+            return lambda rows: wilson_lower_bound_batch(rows[:, 0], rows[:, 1], self.confidence)
+        if kind == "products":
+            return lambda rows: bayesian_average_rating_matrix(rows, self.confidence)
+        return lambda rows: weighted_rating(rows[:, 0], rows[:, 1], self.movie_M, self.movie_C)
+
+    def _batcher(self, kind, width):
+        key = (kind, width)
+        if key not in self._batchers:
+            self._batchers[key] = MicroBatcher(self._scorer(kind), self.max_batch_size, self.max_delay, self.stats)
+        return self._batchers[key]
+
+    def parse_items(self, kind, payload):
+        """
+        Validated rows of a request body; raises ValueError with a message for the client.
+        """
+        if kind == "movies" and self.movie_C is None:
+            raise ValueError("movie_C is not configured on this service")
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            raise ValueError('body must be a JSON object with an "items" list')
+
+        try:
+            if kind == "products":
+                rows = [tuple(float(count) for count in item["stars"]) for item in items]
+                if len({len(row) for row in rows}) > 1 or (rows and not rows[0]):
+                    raise ValueError("every item of a request needs the same, non-zero number of star counts")
+            else:
+                fields = ITEM_FIELDS[kind]
+                rows = [tuple(float(item[field]) for field in fields) for item in items]
+        except (KeyError, TypeError) as error:
+            raise ValueError("invalid %s item: %s" % (kind, error)) from None
+        return rows
+
+    async def score(self, kind, rows):
+        """
+        Scores rows of one kind through the micro-batcher; usable without HTTP.
+        """
+        if not rows:
+            return []
+        return await self._batcher(kind, len(rows[0])).submit(rows)
+
+    async def _dispatch(self, method, path, body):
+        if path == "/stats":
+            if method != "GET":
+                return 405, {"error": "use GET"}, 0
+            return 200, self.stats.snapshot(), 0
+        if path == "/stats/reset":
+            if method != "POST":
+                return 405, {"error": "use POST"}, 0
+            self.stats.reset()
+            return 200, {}, 0
+
+        kind = path[len("/score/"):] if path.startswith("/score/") else None
+        if kind not in KINDS:
+            return 404, {"error": "unknown path %s" % path}, 0
+        if method != "POST":
+            return 405, {"error": "use POST"}, 0
+        try:
+            rows = self.parse_items(kind, json.loads(body or b"{}"))
+        except ValueError as error:
+            return 400, {"error": str(error)}, 0
+        scores = await self.score(kind, rows)
+        return 200, {"scores": scores}, len(rows)
+
+    async def _handle_connection(self, reader, writer):
+        self._connections[writer] = None
+        try:
+            while not self._closing:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                self._connections[writer] = asyncio.current_task()
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                start = time.perf_counter()
+                try:
+                    status, payload, n_items = await self._dispatch(method, path.split("?", 1)[0], body)
+                except Exception as error:
+                    status, payload, n_items = 500, {"error": repr(error)}, 0
+                close = headers.get("connection", "").lower() == "close" or self._closing
+                data = json.dumps(payload).encode()
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                             b"Connection: %s\r\n\r\n" % (status, _REASONS[status].encode(), len(data),
+                                                          b"close" if close else b"keep-alive") + data)
+                await writer.drain()
+                if n_items:
+                    self.stats.record_request(time.perf_counter() - start, n_items)
+                self._connections[writer] = None
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Starts listening; port=0 picks a free port, available as service.port afterwards.
+        """
+        self._closing = False
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.stats.reset()
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self, timeout=5.0):
+        """
+
+        Stops the service without stranding requests.
+
+        - No new connections are accepted and the pending micro-batches are flushed at once.
+        - Idle keep-alive connections are closed; the requests in flight are answered with Connection: close,
+          waiting at most timeout seconds before their connections are closed as well.
+        - Server.wait_closed only returns once every connection is closed, so it no longer hangs on idle clients.
+
+        """
+        self._closing = True
+        self._server.close()
+        for batcher in self._batchers.values():
+            batcher.flush()
+
+        busy = [task for task in self._connections.values() if task is not None]
+        for writer, task in list(self._connections.items()):
+            if task is None:
+                writer.close()
+        if busy:
+            await asyncio.wait(busy, timeout=timeout)
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+
+
+class ScoringClient:
+    """
+    Minimal keep-alive HTTP client of a ScoringService, e.g. for localhost tests and load generation.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080):
+        self.host = host
+        self.port = port
+        self._reader = self._writer = None
+
+    async def _request(self, method, path, payload=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self._writer.write(b"%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                           b"Content-Length: %d\r\n\r\n" % (method.encode(), path.encode(), self.host.encode(),
+                                                            len(body)) + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        response = json.loads(await self._reader.readexactly(length))
+        if status != 200:
+            raise ValueError("HTTP %d: %s" % (status, response.get("error")))
+        return response
+
+    async def score(self, kind, items):
+        return (await self._request("POST", "/score/%s" % kind, {"items": items}))["scores"]
+
+    async def stats(self):
+        return await self._request("GET", "/stats")
+
+    async def reset_stats(self):
+        return await self._request("POST", "/stats/reset")
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching scoring service for reviews, products and movies.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=512)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--movie-m", type=float, default=M)
+    parser.add_argument("--movie-c", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = ScoringService(args.max_batch_size, args.max_delay_ms / 1000, args.confidence,
+                                 args.movie_m, args.movie_c)
+        await service.start(args.host, args.port)
+        print("Scoring service listening on http://%s:%d" % (args.host, service.port))
+        await service.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Mergeable streaming quantile sketch.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+
+    Log-bucketed quantile sketch (DDSketch style).
+
+    - Every value falls into a bucket whose bounds are within relative_accuracy of each other,
+      so quantile estimates have a bounded relative error. Negative values are kept in mirrored buckets.
+    - Values can be added and removed, and sketches built on different chunks or workers can be merged.
+    - Memory is O(number of buckets), e.g. about 800 buckets for values up to 1e7 at 1% accuracy.
+
+    Parameters
+    ----------
+    relative_accuracy: float
+        relative error bound of the quantile estimates
+
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = Counter()
+        self.negative_bins = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _bins_of(self, value):
+        return self.bins if value > 0 else self.negative_bins
+
+    def add(self, value, count=1):
+        if value == 0:
+            self.zero_count += count
+        else:
+            self._bins_of(value)[self._key(abs(value))] += count
+        self.count += count
+
+    def _add_keys(self, bins, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+        bins.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        negative = values[values < 0]
+        self._add_keys(self.bins, positive)
+        self._add_keys(self.negative_bins, -negative)
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def remove(self, value, count=1):
+        if value == 0:
+            self.zero_count -= count
+        else:
+            bins = self._bins_of(value)
+            key = self._key(abs(value))
+            bins[key] -= count
+            if bins[key] <= 0:
+                del bins[key]
+        self.count -= count
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative_accuracy can be merged")
+        self.bins.update(other.bins)
+        self.negative_bins.update(other.negative_bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile (0 <= q <= 1); NaN for an empty sketch.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+
+        # Ascending order: negative buckets by decreasing magnitude, zeros, positive buckets.
+        seen = 0
+        for key in sorted(self.negative_bins, reverse=True):
+            seen += self.negative_bins[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.bins)) if self.bins else 0.0
@@ -0,0 +1,102 @@
+"""
+Product sorting scores: scaled counts, weighted sorting score and hybrid (BAR + WSS) score.
+"""
+
+from measurement_problems.bar import bayesian_average_rating_matrix
+from measurement_problems.scaling import MinMaxState, min_max_scale
+
+PRODUCT_STAR_COLUMNS = ["1_point", "2_point", "3_point", "4_point", "5_point"]
+SCORE_COLUMNS = ['purchase_count_scaled', 'comment_count_scaled', 'bar_score', 'weighted_sorting_score',
+                 'hybrid_sorting_score']
+
+
+def weighted_sorting_score(dataframe, w1=32, w2=26, w3=42):
+    return (dataframe['comment_count_scaled'] * w1 / 100 +
+            dataframe['purchase_count_scaled'] * w2 / 100 +
+            dataframe['rating'] * w3 / 100)
+
+
+def hybrid_sorting_score(dataframe, bar_w=60, wss_w=40, confidence=0.95):
+    bar_score = bayesian_average_rating_matrix(dataframe[PRODUCT_STAR_COLUMNS], confidence)
+    wss_score = weighted_sorting_score(dataframe)
+
+    return bar_score * bar_w / 100 + wss_score * wss_w / 100
+
+
+def add_product_scores(dataframe, w1=32, w2=26, w3=42, bar_w=60, wss_w=40, confidence=0.95,
+                       purchase_bounds=(None, None), comment_bounds=(None, None)):
+    """
+    Adds purchase_count_scaled, comment_count_scaled, bar_score, weighted_sorting_score
+    and hybrid_sorting_score columns to a product_sorting frame, in place.
+    The (min, max) scaling bounds default to the bounds of the frame itself.
+    """
+    dataframe['purchase_count_scaled'] = min_max_scale(dataframe['purchase_count'], (1, 5), *purchase_bounds)
+    dataframe['comment_count_scaled'] = min_max_scale(dataframe['commment_count'], (1, 5), *comment_bounds)
+    dataframe['bar_score'] = bayesian_average_rating_matrix(dataframe[PRODUCT_STAR_COLUMNS], confidence)
+    dataframe['weighted_sorting_score'] = weighted_sorting_score(dataframe, w1, w2, w3)
+    dataframe['hybrid_sorting_score'] = dataframe['bar_score'] * bar_w / 100 + \
+        dataframe['weighted_sorting_score'] * wss_w / 100
+    return dataframe
+
+
+class ProductScoreUpdater:
+    """
+
+    Keeps the product scores of a catalog up to date as product counts change.
+
+    - purchase_count and commment_count bounds are tracked with MinMaxState, in O(1) per changed row.
+    - When no bound moves, only the changed rows are rescaled and rescored.
+    - When a bound moves, the scaled columns of every row change, so the whole catalog is rescored once.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        product_sorting frame; score columns are added and kept up to date in place
+    score_params: dict
+        w1, w2, w3, bar_w, wss_w and confidence passed to add_product_scores
+
+    """
+
+    def __init__(self, dataframe, **score_params):
+        self.dataframe = dataframe
+        self.score_params = score_params
+        self.purchase = MinMaxState((1, 5)).fit(dataframe['purchase_count'])
+        self.comment = MinMaxState((1, 5)).fit(dataframe['commment_count'])
+        self._score(dataframe)
+
+    def _score(self, frame):
+        return add_product_scores(frame, purchase_bounds=self.purchase.bounds, comment_bounds=self.comment.bounds,
+                                  **self.score_params)
+
+    def update(self, updates):
+        """
+
+        Applies new raw values (counts, rating, star counts) and rescores the affected rows.
+
+        Parameters
+        ----------
+        updates: pd.DataFrame
+            indexed by row id of the catalog, with the changed raw columns
+
+        Returns
+        -------
+        rescored row ids: pd.Index
+
+        """
+        rows = updates.index
+        bounds_moved = False
+        for column, state in (('purchase_count', self.purchase), ('commment_count', self.comment)):
+            if column in updates:
+                for old_value, new_value in zip(self.dataframe.loc[rows, column].tolist(), updates[column].tolist()):
+                    bounds_moved |= state.replace(old_value, new_value)
+
+        for column in updates.columns:
+            self.dataframe.loc[rows, column] = updates[column].astype(self.dataframe[column].dtype)
+
+        if bounds_moved:
+            self._score(self.dataframe)
+            return self.dataframe.index
+
+        frame = self._score(self.dataframe.loc[rows].copy())
+        self.dataframe.loc[rows, SCORE_COLUMNS] = frame[SCORE_COLUMNS]
+        return rows
@@ -0,0 +1,190 @@
+"""
+Single-pass, mergeable descriptive statistics, correlations and confidence intervals over chunked data.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems.sketch import QuantileSketch
+
+
+class _Moments:
+    """
+    count, mean, M2, min and max of one column, merged with the parallel Welford formula.
+    """
+
+    def __init__(self, relative_accuracy):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean_b = values.mean()
+        self._merge(len(values), mean_b, ((values - mean_b) ** 2).sum())
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.sketch.add_many(values)
+
+    def _merge(self, n_b, mean_b, m2_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+
+    def merge(self, other):
+        if other.n:
+            self._merge(other.n, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self.sketch.merge(other.sketch)
+
+
+class _CoMoments:
+    """
+    Pairwise-complete count, means, M2s and co-moment of two columns.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+
+    def update(self, x, y):
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+        if len(x) == 0:
+            return
+        mean_x, mean_y = x.mean(), y.mean()
+        dx, dy = x - mean_x, y - mean_y
+        self._merge(len(x), mean_x, mean_y, (dx * dx).sum(), (dy * dy).sum(), (dx * dy).sum())
+
+    def _merge(self, n_b, mean_x, mean_y, m2_x, m2_y, c_xy):
+        n = self.n + n_b
+        delta_x, delta_y = mean_x - self.mean_x, mean_y - self.mean_y
+        weight = self.n * n_b / n
+        self.m2_x += m2_x + delta_x * delta_x * weight
+        self.m2_y += m2_y + delta_y * delta_y * weight
+        self.c_xy += c_xy + delta_x * delta_y * weight
+        self.mean_x += delta_x * n_b / n
+        self.mean_y += delta_y * n_b / n
+        self.n = n
+
+    def merge(self, other):
+        if other.n:
+            self._merge(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+
+class StreamingDescriber:
+    """
+
+    describe-style summaries, covariance / Pearson r and t confidence intervals without materializing the data.
+
+    - Every chunk is reduced to per-column moments (count, mean, M2, min, max), a quantile sketch,
+      and pairwise co-moments; accumulators of different chunks or workers are merged exactly,
+      except for the quantiles, which are approximate within relative_accuracy.
+
+    Parameters
+    ----------
+    columns: list of str
+        numeric columns to summarize
+    relative_accuracy: float
+        relative accuracy of the quantile sketches
+    correlations: bool
+        also keep pairwise co-moments (O(columns ** 2) state)
+
+    """
+
+    def __init__(self, columns, relative_accuracy=0.01, correlations=True):
+        self.columns = list(columns)
+        self.relative_accuracy = relative_accuracy
+        self.moments = {column: _Moments(relative_accuracy) for column in self.columns}
+        self.co_moments = {pair: _CoMoments() for pair in combinations(self.columns, 2)} if correlations else {}
+
+    @classmethod
+    def from_chunks(cls, chunks, columns, n_jobs=1, **kwargs):
+        """
+        Summarizes an iterable of DataFrame chunks; with n_jobs != 1 chunks are reduced on a process pool and merged.
+        """
+        describer = cls(columns, **kwargs)
+        if n_jobs == 1:
+            for chunk in chunks:
+                describer.update(chunk)
+            return describer
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for partial in executor.map(_describe_chunk, ((chunk, columns, kwargs) for chunk in chunks)):
+                describer.merge(partial)
+        return describer
+
+    def update(self, chunk):
+        arrays = {column: chunk[column].to_numpy(dtype=np.float64, na_value=np.nan) for column in self.columns}
+        for column, moments in self.moments.items():
+            moments.update(arrays[column])
+        for (x, y), co_moments in self.co_moments.items():
+            co_moments.update(arrays[x], arrays[y])
+        return self
+
+    def merge(self, other):
+        for column, moments in self.moments.items():
+            moments.merge(other.moments[column])
+        for pair, co_moments in self.co_moments.items():
+            co_moments.merge(other.co_moments[pair])
+        return self
+
+    def describe(self, percentiles=(0.25, 0.50, 0.75)):
+        """
+        Same layout as dataframe[columns].describe(percentiles).T, with sketched percentiles.
+        """
+        rows = {}
+        for column, m in self.moments.items():
+            row = {"count": m.n, "mean": m.mean if m.n else np.nan,
+                   "std": math.sqrt(m.m2 / (m.n - 1)) if m.n > 1 else np.nan,
+                   "min": m.min if m.n else np.nan}
+            for q in percentiles:
+                row["%g%%" % (q * 100)] = m.sketch.quantile(q)
+            row["max"] = m.max if m.n else np.nan
+            rows[column] = row
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def _pair(self, x, y):
+        if (x, y) in self.co_moments:
+            return self.co_moments[(x, y)]
+        return self.co_moments[(y, x)]
+
+    def cov(self, x, y):
+        pair = self._pair(x, y)
+        return pair.c_xy / (pair.n - 1) if pair.n > 1 else np.nan
+
+    def corr(self, x, y):
+        """
+        Pearson r on pairwise complete rows, same as dataframe[x].corr(dataframe[y]).
+        """
+        pair = self._pair(x, y)
+        denominator = math.sqrt(pair.m2_x * pair.m2_y)
+        return pair.c_xy / denominator if denominator else np.nan
+
+    def tconfint_mean(self, column, alpha=0.05):
+        """
+        Same result as DescrStatsW(values).tconfint_mean(alpha).
+        """
+        from scipy.stats import t as t_dist
+
+        m = self.moments[column]
+        half_width = t_dist.ppf(1 - alpha / 2, m.n - 1) * math.sqrt(m.m2 / (m.n - 1) / m.n)
+        return m.mean - half_width, m.mean + half_width
+
+
+def _describe_chunk(task):
+    chunk, columns, kwargs = task
+    return StreamingDescriber(columns, **kwargs).update(chunk)
@@ -0,0 +1,109 @@
+"""
+Top-K rankings with partial selection instead of full sorts.
+"""
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems._util import row_mask
+
+
+def _selection_scores(scores):
+    # NaN scores never make it to the top, same as sort_values(ascending=False) putting them last.
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.where(np.isnan(scores), -np.inf, scores)
+
+
+def top_k_positions(scores, k=20):
+    """
+
+    Positions of the k highest scores, ordered from the highest score down.
+
+    - np.argpartition selects the k candidates in O(N); only those k are sorted afterwards.
+
+    Parameters
+    ----------
+    scores: array-like
+        scores
+    k: int
+        number of positions to return
+
+    Returns
+    -------
+    positions: np.ndarray of int
+
+    """
+    scores = _selection_scores(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k(dataframe, score_col, k=20, where=None):
+    """
+
+    Same rows as dataframe[where].sort_values(score_col, ascending=False).head(k), without the full sort.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        frame to rank
+    score_col: str
+        score column, e.g. hybrid_sorting_score, bar_score, weighted_rating, wilson_lower_bound
+    k: int
+        number of rows to return
+    where: callable or boolean array-like
+        optional filter; a callable receives the frame and returns a boolean mask,
+        e.g. lambda x: x["course_name"].str.contains("Veri Bilimi")
+
+    Returns
+    -------
+    top rows: pd.DataFrame
+
+    """
+    mask = row_mask(dataframe, where)
+    scores = dataframe[score_col].to_numpy()
+    if mask is None:
+        return dataframe.iloc[top_k_positions(scores, k)]
+
+    candidates = np.flatnonzero(mask)
+    return dataframe.iloc[candidates[top_k_positions(scores[candidates], k)]]
+
+
+def top_k_per_group(dataframe, score_col, group_col, k=20, where=None):
+    """
+
+    Top-K rows of every group, e.g. the 20 best products of each category.
+
+    - Rows are bucketed by group code once; every group then only runs a partial selection.
+
+    Returns
+    -------
+    top rows: pd.DataFrame, grouped in order of first appearance and ranked by score inside each group
+
+    """
+    mask = row_mask(dataframe, where)
+    candidates = np.arange(len(dataframe)) if mask is None else np.flatnonzero(mask)
+
+    codes, uniques = pd.factorize(dataframe[group_col].to_numpy()[candidates])
+    # Rows without a group are left out, as groupby does.
+    candidates, codes = candidates[codes >= 0], codes[codes >= 0]
+    if len(uniques) <= np.iinfo(np.uint16).max:
+        # NumPy uses an O(N) radix sort for stable sorts of 16 bit integers.
+        codes = codes.astype(np.uint16)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    scores = dataframe[score_col].to_numpy()[candidates]
+
+    positions = []
+    for group in np.split(order, bounds):
+        if len(group):
+            positions.append(group[top_k_positions(scores[group], k)])
+    if not positions:
+        return dataframe.iloc[[]]
+    return dataframe.iloc[candidates[np.concatenate(positions)]]
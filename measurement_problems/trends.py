@@ -0,0 +1,267 @@
+"""
+Sliding-window rating trend monitor: rolling means, trend deltas and change-point flags per course.
+"""
+
+import numpy as np
+import pandas as pd
+
+from measurement_problems._util import to_days
+
+
+class RatingTrendMonitor:
+    """
+
+    Rolling window mean rating of many courses, compared with the window before it.
+
+    - Every course keeps a ring buffer of 2 * window_days / bucket_days time buckets (rating sum, sum of squares
+      and count per bucket): the current window and the baseline window right before it.
+      Memory is bounded by courses * buckets * 20 bytes, e.g. 60 MB for 50k courses, 30 day windows and daily buckets.
+    - Window totals are kept up to date incrementally: when the clock moves one bucket forward, the oldest
+      current bucket moves to the baseline and the oldest baseline bucket is dropped, for all courses at once.
+    - A course is flagged as a change point when both windows have at least min_count reviews and
+      the rolling mean moved by at least min_delta with a Welch z score of at least z_threshold;
+      an alert is a change point with a drop of the rolling mean.
+    - poll returns only the courses whose alert state changed since the last poll.
+
+    Parameters
+    ----------
+    window_days: int
+        length of the rolling window, in days
+    bucket_days: int
+        time resolution of the ring buffer, in days; window_days must be a multiple of it
+    min_count: int
+        reviews needed in both windows before a course can be flagged
+    min_delta: float
+        smallest absolute change of the rolling mean that can be flagged
+    z_threshold: float
+        smallest absolute Welch z score of the change that can be flagged
+    current_date: str, datetime or pd.Timestamp
+        initial clock; defaults to the date of the first review
+
+    """
+
+    def __init__(self, window_days=30, bucket_days=1, min_count=20, min_delta=0.2, z_threshold=3.0,
+                 current_date=None):
+        if window_days % bucket_days:
+            raise ValueError("window_days must be a multiple of bucket_days")
+        self.window_days = window_days
+        self.bucket_days = bucket_days
+        self.min_count = min_count
+        self.min_delta = min_delta
+        self.z_threshold = z_threshold
+
+        self._window_buckets = window_days // bucket_days
+        self._n_buckets = 2 * self._window_buckets
+        self._clock = None if current_date is None else self._bucket_of(to_days(current_date))
+
+        self.courses = []
+        self._course_index = pd.Index([])
+        self._sums = np.zeros((0, self._n_buckets))
+        self._squares = np.zeros((0, self._n_buckets))
+        self._counts = np.zeros((0, self._n_buckets), dtype=np.int32)
+        # Totals of the current window (index 0) and of the baseline window (index 1), per course.
+        self._window_sums = np.zeros((2, 0))
+        self._window_squares = np.zeros((2, 0))
+        self._window_counts = np.zeros((2, 0), dtype=np.int64)
+        self._alerted = np.zeros(0, dtype=bool)
+
+    def _bucket_of(self, days):
+        return np.floor_divide(days, self.bucket_days).astype(np.int64)
+
+    def __len__(self):
+        return len(self.courses)
+
+    @property
+    def nbytes(self):
+        arrays = (self._sums, self._squares, self._counts, self._window_sums, self._window_squares,
+                  self._window_counts, self._alerted)
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def current_date(self):
+        if self._clock is None:
+            return None
+        return pd.Timestamp(int(self._clock * self.bucket_days), unit='D')
+
+    ####################
+    # State
+    ####################
+
+    def _grow(self, n_courses):
+        capacity = len(self._alerted)
+        if n_courses <= capacity:
+            return
+        capacity = max(n_courses, 16, 2 * capacity)
+
+        def grown(array, axis):
+            shape = list(array.shape)
+            shape[axis] = capacity
+            new = np.zeros(shape, dtype=array.dtype)
+            index = [slice(None)] * array.ndim
+            index[axis] = slice(0, array.shape[axis])
+            new[tuple(index)] = array
+            return new
+
+        self._sums, self._squares, self._counts = (grown(a, 0) for a in (self._sums, self._squares, self._counts))
+        self._window_sums, self._window_squares, self._window_counts = (
+            grown(a, 1) for a in (self._window_sums, self._window_squares, self._window_counts))
+        self._alerted = grown(self._alerted, 0)
+
+    def _slots_of(self, courses):
+        codes, uniques = pd.factorize(np.asarray(courses), use_na_sentinel=False)
+        slots = self._course_index.get_indexer(uniques)
+        new = slots < 0
+        if new.any():
+            slots[new] = np.arange(len(self.courses), len(self.courses) + new.sum())
+            self.courses.extend(uniques[new].tolist())
+            self._course_index = self._course_index.append(pd.Index(uniques[new]))
+            self._grow(len(self.courses))
+        return slots[codes]
+
+    def _advance_buckets(self, bucket):
+        if self._clock is None:
+            self._clock = bucket
+            return
+        if bucket <= self._clock:
+            return
+        n = len(self.courses)
+        if bucket - self._clock >= self._n_buckets:
+            # Every stored bucket falls out of both windows.
+            for array in (self._sums, self._squares, self._counts, self._window_sums, self._window_squares,
+                          self._window_counts):
+                array[...] = 0
+            self._clock = bucket
+            return
+
+        totals = (self._window_sums, self._window_squares, self._window_counts)
+        cells = (self._sums, self._squares, self._counts)
+        for new_bucket in range(self._clock + 1, bucket + 1):
+            # new_bucket - n_buckets leaves the baseline and its slot is reused by new_bucket.
+            dropped = new_bucket % self._n_buckets
+            for total, cell in zip(totals, cells):
+                total[1, :n] -= cell[:n, dropped]
+                cell[:n, dropped] = 0
+            # new_bucket - window_buckets leaves the current window for the baseline.
+            moved = (new_bucket - self._window_buckets) % self._n_buckets
+            for total, cell in zip(totals, cells):
+                total[0, :n] -= cell[:n, moved]
+                total[1, :n] += cell[:n, moved]
+        # Sums of an emptied window are reset, so no rounding residue is left behind.
+        empty = self._window_counts[:, :n] == 0
+        self._window_sums[:, :n][empty] = 0.0
+        self._window_squares[:, :n][empty] = 0.0
+        self._clock = bucket
+
+    ####################
+    # Updates
+    ####################
+
+    def add_reviews(self, courses, ratings, timestamps):
+        """
+
+        Adds a batch of review events; the clock moves forward to the newest review.
+
+        - Reviews older than the baseline window are ignored.
+        - Reviews are summed per (course, bucket) cell with np.bincount before the state is updated.
+
+        Parameters
+        ----------
+        courses: array-like
+            course id of every review
+        ratings: array-like
+            rating of every review
+        timestamps: array-like
+            timestamp of every review
+
+        Returns
+        -------
+        number of reviews added: int
+
+        """
+        ratings = np.asarray(ratings, dtype=np.float64)
+        if len(ratings) == 0:
+            return 0
+        buckets = self._bucket_of(to_days(timestamps))
+        slots = self._slots_of(courses)
+        self._advance_buckets(int(buckets.max()))
+
+        age = self._clock - buckets
+        keep = age < self._n_buckets
+        slots, ratings, buckets, age = slots[keep], ratings[keep], buckets[keep], age[keep]
+        columns = buckets % self._n_buckets
+        window = (age >= self._window_buckets).astype(np.int64)
+
+        # Reviews of the same (course, bucket) cell are summed first, so every cell is updated once.
+        capacity = len(self._alerted)
+        cells, inverse = np.unique(columns * capacity + slots, return_inverse=True)
+        cell_slots, cell_columns = cells % capacity, cells // capacity
+        squares = ratings * ratings
+        self._sums[cell_slots, cell_columns] += np.bincount(inverse, ratings, len(cells))
+        self._squares[cell_slots, cell_columns] += np.bincount(inverse, squares, len(cells))
+        self._counts[cell_slots, cell_columns] += np.bincount(inverse, minlength=len(cells)).astype(np.int32)
+
+        totals = window * capacity + slots
+        self._window_sums += np.bincount(totals, ratings, 2 * capacity).reshape(2, capacity)
+        self._window_squares += np.bincount(totals, squares, 2 * capacity).reshape(2, capacity)
+        self._window_counts += np.bincount(totals, minlength=2 * capacity).reshape(2, capacity)
+        return int(keep.sum())
+
+    def add_review(self, course, rating, timestamp):
+        return self.add_reviews([course], [rating], [timestamp])
+
+    def advance_to(self, current_date):
+        """
+        Moves the clock forward without new reviews, e.g. before a scheduled refresh.
+        """
+        self._advance_buckets(int(self._bucket_of(to_days(current_date))))
+
+    ####################
+    # Trends
+    ####################
+
+    def _stats(self):
+        n = len(self.courses)
+        counts = self._window_counts[:, :n].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = self._window_sums[:, :n] / counts
+            variances = np.maximum(self._window_squares[:, :n] - counts * means * means, 0.0) / (counts - 1)
+            delta = means[0] - means[1]
+            z = delta / np.sqrt(variances[0] / counts[0] + variances[1] / counts[1])
+        change_point = ((counts.min(axis=0) >= self.min_count) & (np.abs(delta) >= self.min_delta) &
+                        (np.abs(z) >= self.z_threshold))
+        return counts, means, delta, z, change_point
+
+    def _frame(self, positions, counts, means, delta, z, change_point):
+        return pd.DataFrame({"window_mean": means[0, positions], "window_count": counts[0, positions],
+                             "baseline_mean": means[1, positions], "baseline_count": counts[1, positions],
+                             "delta": delta[positions], "z": z[positions],
+                             "change_point": change_point[positions],
+                             "alert": change_point[positions] & (delta[positions] < 0)},
+                            index=pd.Index(np.asarray(self.courses, dtype=object)[positions], name="course"))
+
+    def rolling_mean(self):
+        """
+        Mean rating of the current window per course; NaN without reviews in the window.
+        """
+        n = len(self.courses)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = self._window_sums[0, :n] / self._window_counts[0, :n]
+        return pd.Series(means, index=pd.Index(self.courses, name="course"), name="rolling_mean")
+
+    def trends(self):
+        """
+        Window and baseline means, counts, delta, z score, change_point and alert flags of every course.
+        """
+        stats = self._stats()
+        return self._frame(np.arange(len(self.courses)), *stats)
+
+    def poll(self):
+        """
+        Trend rows of the courses whose alert was raised (alert True) or cleared (alert False) since the last poll.
+        """
+        counts, means, delta, z, change_point = self._stats()
+        n = len(self.courses)
+        alert = change_point & (delta < 0)
+        changed = np.flatnonzero(alert != self._alerted[:n])
+        self._alerted[:n] = alert
+        return self._frame(changed, counts, means, delta, z, change_point)